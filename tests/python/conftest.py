@@ -7,57 +7,91 @@ Provides fixtures for:
 - State file generation
 """
 
-import tempfile
-
-
+import json
+import os
 import subprocess
 from pathlib import Path
-
-import shutil
+from types import MappingProxyType
 
 import pytest
 
+try:
+    import orjson
 
-@pytest.fixture
-def temp_test_dir():
-    """Create a temporary directory for test output."""
-    test_dir = tempfile.mkdtemp(prefix="cross_val_test_")
-    yield Path(test_dir)
-    shutil.rmtree(test_dir, ignore_errors=True)
+    _ORJSON_AVAILABLE = True
+except ImportError:
+    _ORJSON_AVAILABLE = False
+
+from tools.testing.pnl_tracker import PnLTracker
+from tools.visualizer.order_book import Order, OrderBook, Side
+
+CPP_BINARY_NAME = "cross_validation_tests"
+
+# Only failures are printed; the log is read back only when a scenario fails.
+_GTEST_QUIET_FLAGS = ("--gtest_brief=1", "--gtest_print_time=0", "--gtest_color=no")
 
 
 @pytest.fixture
+def temp_test_dir(tmp_path_factory):
+    """
+    Create a temporary directory for test output.
+
+    Directories live under pytest's session base temp and are cleaned up by
+    its retention policy rather than removed after every test.
+    """
+    return tmp_path_factory.mktemp("cross_val", numbered=True)
+
+
+@pytest.fixture(scope="session")
 def cpp_test_binary():
     """
     Get path to the C++ cross_validation_tests binary.
 
     Assumes it's built in the default build directory.
     Override with --cpp-binary pytest option if needed.
+
+    Session-scoped: the build location does not change during a run, so
+    the candidate paths are probed once.
     """
-    # Check common build locations
+    # Check common build locations, in priority order
     project_root = Path(__file__).parent.parent.parent
-    possible_paths = [
-        project_root / "build" / "debug" / "cross_validation_tests",
-        project_root / "build" / "cross_validation_tests",
-        project_root / "cmake-build-debug" / "cross_validation_tests",
-        project_root / "cmake-build-release" / "cross_validation_tests",
+    build_dirs = [
+        project_root / "build" / "debug",
+        project_root / "build",
+        project_root / "cmake-build-debug",
+        project_root / "cmake-build-release",
     ]
 
-    for path in possible_paths:
-        if path.exists():
-            return path
+    # One directory listing per build dir; DirEntry.is_file() answers from the
+    # dirent type without a separate stat of the candidate path.
+    for build_dir in build_dirs:
+        try:
+            with os.scandir(build_dir) as entries:
+                for entry in entries:
+                    if entry.name == CPP_BINARY_NAME and entry.is_file():
+                        return Path(entry.path)
+        except OSError:
+            continue
 
     pytest.skip("C++ cross_validation_tests binary not found. Build with cmake first.")
 
 
-@pytest.fixture
-def run_cpp_scenario(cpp_test_binary, temp_test_dir):
+@pytest.fixture(scope="session")
+def run_cpp_scenario(cpp_test_binary, tmp_path_factory):
     """
     Factory fixture to run a specific C++ test scenario.
 
     Returns a function that takes a scenario name and runs the C++ test,
     returning the output directory path.
+
+    Session-scoped: each scenario is executed at most once per run and its
+    output directory is reused by every test that asks for it. Scenario
+    outputs are read-only inputs to the validators, so sharing them is safe.
     """
+    scenario_root = tmp_path_factory.mktemp("cpp_scenarios")
+    completed: dict[str, Path] = {}
+    # Inherit PATH, LD_LIBRARY_PATH etc.; only the output dir varies per run.
+    base_env = dict(os.environ)
 
     def _run_scenario(scenario_name: str) -> Path:
         """
@@ -69,40 +103,138 @@ def run_cpp_scenario(cpp_test_binary, temp_test_dir):
         Returns:
             Path to the output directory containing deltas.csv, trades.csv, states/
         """
+        if scenario_name in completed:
+            return completed[scenario_name]
+
         # Create scenario-specific output directory
-        output_dir = temp_test_dir / scenario_name
+        output_dir = scenario_root / scenario_name
         output_dir.mkdir(parents=True, exist_ok=True)
 
-        # Run the specific test
-        result = subprocess.run(
-            [
-                str(cpp_test_binary),
-                f"--gtest_filter=*{scenario_name}*",
-                f"--output_dir={output_dir}",
-            ],
-            capture_output=True,
-            text=True,
-            cwd=temp_test_dir,
-            env={"OUTPUT_DIR": str(output_dir)},
-            check=False,
-        )
+        # Run the specific test. Output goes to log files next to the
+        # scenario output and is only read back if the run fails. The binary
+        # locates its output via CROSS_VAL_OUTPUT_DIR, not the working dir.
+        stdout_path = output_dir / "gtest.stdout"
+        stderr_path = output_dir / "gtest.stderr"
+        with open(stdout_path, "wb") as stdout_file, open(stderr_path, "wb") as stderr_file:
+            result = subprocess.run(
+                [
+                    str(cpp_test_binary),
+                    f"--gtest_filter=*{scenario_name}*",
+                    *_GTEST_QUIET_FLAGS,
+                ],
+                stdout=stdout_file,
+                stderr=stderr_file,
+                env={**base_env, "CROSS_VAL_OUTPUT_DIR": str(output_dir)},
+                # No cwd and close_fds=False let CPython launch via
+                # posix_spawn instead of fork+exec. Python-created fds are
+                # non-inheritable by default, so nothing extra leaks.
+                close_fds=False,
+                check=False,
+            )
 
         if result.returncode != 0:
             pytest.fail(
                 f"C++ test {scenario_name} failed:\n"
-                f"stdout: {result.stdout}\n"
-                f"stderr: {result.stderr}"
+                f"stdout: {stdout_path.read_text(errors='replace')}\n"
+                f"stderr: {stderr_path.read_text(errors='replace')}"
             )
 
+        completed[scenario_name] = output_dir
         return output_dir
 
     return _run_scenario
 
 
+@pytest.fixture(scope="session")
+def write_state_file():
+    """
+    Factory fixture that writes a C++-style state snapshot.
+
+    Returns a function taking (states_dir, sequence_num, state) that writes
+    states_dir/state_NNNNNN.json and returns its path. Uses orjson when it
+    is installed (encodes straight to bytes), stdlib json otherwise.
+    """
+
+    def _write_state(states_dir: Path, sequence_num: int, state) -> Path:
+        if _ORJSON_AVAILABLE:
+            payload = orjson.dumps(state)
+        else:
+            payload = json.dumps(state).encode()
+        path = states_dir / f"state_{sequence_num:06d}.json"
+        path.write_bytes(payload)
+        return path
+
+    return _write_state
+
+
+_ORDER_DEFAULTS = MappingProxyType(
+    {
+        "order_id": 1,
+        "client_id": 100,
+        "side": Side.BUY,
+        "price": 1000,
+        "quantity": 50,
+        "timestamp": 100,
+    }
+)
+
+
+@pytest.fixture(scope="session")
+def order_factory():
+    """
+    Factory for Order objects.
+
+    Returns a function that builds a resting BUY order for client 100 at
+    1000 x 50, with any field overridden by keyword.
+    """
+
+    def _make(**overrides) -> Order:
+        return Order(**{**_ORDER_DEFAULTS, **overrides})
+
+    return _make
+
+
 @pytest.fixture
-def sample_state_json():
-    """Sample C++ state JSON for testing comparator directly."""
-    return {
+def fresh_book():
+    """Empty OrderBook."""
+    return OrderBook()
+
+
+@pytest.fixture(scope="session")
+def invariant_tracker():
+    """
+    PnLTracker after a fixed set of trades among three clients.
+
+    Replayed once per session; tests should only read from it.
+    """
+    tracker = PnLTracker()
+
+    trades = [
+        (1, 2, 1000, 100),  # buyer_id, seller_id, price, qty
+        (3, 1, 1001, 50),
+        (2, 3, 999, 25),
+        (1, 3, 1000, 75),
+    ]
+
+    for buyer, seller, price, qty in trades:
+        tracker.on_trade(buyer, seller, price, qty)
+
+    return tracker
+
+
+def _freeze(value):
+    """Recursively wrap dicts in read-only proxies and lists in tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+# Sample payloads are built once and shared read-only across the session.
+# A test that needs to modify one should build its own copy.
+_SAMPLE_STATE_JSON = _freeze(
+    {
         "timestamp": 100,
         "sequence_num": 1,
         "order_books": {
@@ -128,12 +260,10 @@ def sample_state_json():
         },
         "pnl": {},
     }
+)
 
-
-@pytest.fixture
-def sample_state_with_trade():
-    """Sample C++ state JSON with P&L from a trade."""
-    return {
+_SAMPLE_STATE_WITH_TRADE = _freeze(
+    {
         "timestamp": 200,
         "sequence_num": 3,
         "order_books": {
@@ -147,22 +277,116 @@ def sample_state_with_trade():
             "101": {"long_position": 0, "short_position": 50, "cash": 50000},
         },
     }
+)
 
-
-@pytest.fixture
-def sample_deltas_content():
-    """Sample deltas.csv content for testing."""
-    return """timestamp,sequence_num,delta_type,order_id,client_id,instrument_id,side,price,quantity,remaining_qty,trade_id,new_order_id,new_price,new_quantity
+_SAMPLE_DELTAS_CSV = """timestamp,sequence_num,delta_type,order_id,client_id,instrument_id,side,price,quantity,remaining_qty,trade_id,new_order_id,new_price,new_quantity
 100,0,ADD,1,100,1,BUY,1000,50,50,0,0,0,0
 200,1,ADD,2,101,1,SELL,1000,50,50,0,0,0,0
 200,2,FILL,1,100,1,BUY,1000,50,0,1,0,0,0
 200,3,FILL,2,101,1,SELL,1000,50,0,1,0,0,0
 """
 
+_SAMPLE_TRADES_CSV = """timestamp,trade_id,instrument_id,buyer_id,seller_id,buyer_order_id,seller_order_id,price,quantity
+200,1,1,100,101,1,2,1000,50
+"""
 
-@pytest.fixture
+
+@pytest.fixture(scope="session")
+def sample_state_json():
+    """Sample C++ state JSON for testing comparator directly."""
+    return _SAMPLE_STATE_JSON
+
+
+@pytest.fixture(scope="session")
+def sample_state_with_trade():
+    """Sample C++ state JSON with P&L from a trade."""
+    return _SAMPLE_STATE_WITH_TRADE
+
+
+@pytest.fixture(scope="session")
+def sample_deltas_content():
+    """Sample deltas.csv content for testing."""
+    return _SAMPLE_DELTAS_CSV
+
+
+@pytest.fixture(scope="session")
 def sample_trades_content():
     """Sample trades.csv content for testing."""
-    return """timestamp,trade_id,instrument_id,buyer_id,seller_id,buyer_order_id,seller_order_id,price,quantity
-200,1,1,100,101,1,2,1000,50
-"""
+    return _SAMPLE_TRADES_CSV
+
+
+@pytest.fixture(scope="session")
+def sample_validator_dir(
+    tmp_path_factory, sample_deltas_content, sample_trades_content, write_state_file
+):
+    """
+    Output directory for the sample deltas/trades with matching C++ states.
+
+    Built once per session. The validator only reads these files, so tests
+    share the directory; a test that needs to modify it should copy it first.
+    """
+    output_dir = tmp_path_factory.mktemp("sample_validator")
+    (output_dir / "deltas.csv").write_text(sample_deltas_content)
+    (output_dir / "trades.csv").write_text(sample_trades_content)
+
+    states_dir = output_dir / "states"
+    states_dir.mkdir()
+
+    # State 0: empty book
+    state_0 = {
+        "timestamp": 0,
+        "sequence_num": 0,
+        "order_books": {"1": {"bids": [], "asks": []}},
+        "pnl": {},
+    }
+    write_state_file(states_dir, 0, state_0)
+
+    # State 1: after first ADD (buy order)
+    state_1 = {
+        "timestamp": 100,
+        "sequence_num": 1,
+        "order_books": {
+            "1": {
+                "bids": [
+                    {
+                        "price": 1000,
+                        "orders": [
+                            {
+                                "order_id": 1,
+                                "client_id": 100,
+                                "quantity": 50,
+                                "price": 1000,
+                                "timestamp": 100,
+                                "side": "BUY",
+                            }
+                        ],
+                    }
+                ],
+                "asks": [],
+            }
+        },
+        "pnl": {},
+    }
+    write_state_file(states_dir, 1, state_1)
+
+    # State 2: after trade (both orders filled, book empty)
+    state_2 = {
+        "timestamp": 200,
+        "sequence_num": 2,
+        "order_books": {"1": {"bids": [], "asks": []}},
+        "pnl": {
+            "100": {"long_position": 50, "short_position": 0, "cash": -50000},
+            "101": {"long_position": 0, "short_position": 50, "cash": 50000},
+        },
+    }
+    write_state_file(states_dir, 2, state_2)
+
+    return output_dir
+
+
+@pytest.fixture
+def validator(sample_validator_dir):
+    """CrossValidator over the shared sample output directory."""
+    from tools.testing.cross_validator import CrossValidator
+
+    return CrossValidator(output_dir=sample_validator_dir)
@@ -5,10 +5,13 @@ These tests verify that the Python replay engine produces exactly
 the same state as the C++ simulation engine.
 """
 
-from tools.visualizer.order_book import OrderBook, Order, Side
+from types import MappingProxyType
+
+import pytest
+
+from tools.visualizer.order_book import OrderBook, Side
 from tools.testing.state_comparator import StateComparator
 from tools.testing.pnl_tracker import PnLTracker
-from tools.testing.cross_validator import CrossValidator
 
 
 class TestStateComparator:
@@ -23,41 +26,27 @@ class TestStateComparator:
         diffs = comparator.compare_order_books(cpp_book, py_book, instrument_id=1)
         assert diffs == []
 
-    def test_compare_single_order_match(self, sample_state_json):
+    def test_compare_single_order_match(self, sample_state_json, order_factory, fresh_book):
         """Single order in book should match when state is correct."""
         comparator = StateComparator()
 
         # Build Python book to match the sample state
-        py_book = OrderBook()
-        order = Order(
-            order_id=1,
-            client_id=100,
-            side=Side.BUY,
-            price=1000,
-            quantity=50,
-            timestamp=100,
-        )
-        py_book._add_order(order)
+        py_book = fresh_book
+        py_book._add_order(order_factory())
 
         cpp_book = sample_state_json["order_books"]["1"]
         diffs = comparator.compare_order_books(cpp_book, py_book, instrument_id=1)
         assert diffs == []
 
-    def test_compare_order_quantity_mismatch(self, sample_state_json):
+    def test_compare_order_quantity_mismatch(
+        self, sample_state_json, order_factory, fresh_book
+    ):
         """Detect quantity mismatch between C++ and Python order."""
         comparator = StateComparator()
 
         # Build Python book with wrong quantity
-        py_book = OrderBook()
-        order = Order(
-            order_id=1,
-            client_id=100,
-            side=Side.BUY,
-            price=1000,
-            quantity=25,  # Wrong quantity
-            timestamp=100,
-        )
-        py_book._add_order(order)
+        py_book = fresh_book
+        py_book._add_order(order_factory(quantity=25))
 
         cpp_book = sample_state_json["order_books"]["1"]
         diffs = comparator.compare_order_books(cpp_book, py_book, instrument_id=1)
@@ -67,6 +56,20 @@ class TestStateComparator:
         assert "C++=50" in diffs[0]
         assert "Py=25" in diffs[0]
 
+    def test_compare_order_side_mismatch(self, sample_state_json, order_factory, fresh_book):
+        """Detect a side mismatch on an order that matches otherwise."""
+        comparator = StateComparator()
+
+        py_book = fresh_book
+        py_book._add_order(order_factory())
+
+        cpp_level = sample_state_json["order_books"]["1"]["bids"][0]
+        cpp_order = {**cpp_level["orders"][0], "side": "SELL"}
+        cpp_book = {"bids": [{"price": cpp_level["price"], "orders": [cpp_order]}], "asks": []}
+        diffs = comparator.compare_order_books(cpp_book, py_book, instrument_id=1)
+
+        assert diffs == ["inst=1 bid[1000][0].side: C++=SELL, Py=BUY"]
+
     def test_compare_missing_order(self, sample_state_json):
         """Detect missing order in Python book."""
         comparator = StateComparator()
@@ -108,20 +111,24 @@ class TestStateComparator:
         assert len(diffs) == 1
         assert "PnL[100].cash" in diffs[0]
 
-    def test_compare_full_state(self, sample_state_json):
+    def test_compare_pnl_accepts_tracker_state(self, sample_state_with_trade):
+        """PnLState objects from the tracker compare like PnL dicts."""
+        comparator = StateComparator()
+
+        tracker = PnLTracker()
+        tracker.on_trade(buyer_id=100, seller_id=101, price=1000, quantity=50)
+        assert comparator.compare_pnl(sample_state_with_trade["pnl"], tracker.pnl) == []
+
+        tracker.on_trade(buyer_id=100, seller_id=101, price=1000, quantity=1)
+        diffs = comparator.compare_pnl(sample_state_with_trade["pnl"], tracker.pnl)
+        assert "PnL[100].cash: C++=-50000, Py=-51000" in diffs
+
+    def test_compare_full_state(self, sample_state_json, order_factory, fresh_book):
         """Full state comparison should work."""
         comparator = StateComparator()
 
-        py_books = {1: OrderBook()}
-        order = Order(
-            order_id=1,
-            client_id=100,
-            side=Side.BUY,
-            price=1000,
-            quantity=50,
-            timestamp=100,
-        )
-        py_books[1]._add_order(order)
+        py_books = {1: fresh_book}
+        py_books[1]._add_order(order_factory())
 
         result = comparator.compare_full_state(sample_state_json, py_books, {})
 
@@ -176,195 +183,138 @@ class TestPnLTracker:
         assert state[2]["short_position"] == 75
         assert state[2]["cash"] == 50 * 1000 + 25 * 1001
 
+    def test_apply_trades_matches_on_trade(self):
+        """Batch application should match calling on_trade per trade."""
+        trades = [(1, 2, 1000, 50), (3, 1, 1001, 25), (2, 3, 999, 10)]
+
+        one_by_one = PnLTracker()
+        for buyer_id, seller_id, price, quantity in trades:
+            one_by_one.on_trade(buyer_id, seller_id, price, quantity)
+
+        batched = PnLTracker()
+        batched.apply_trades(trades)
+
+        assert batched.get_state() == one_by_one.get_state()
+        assert list(batched.pnl) == list(one_by_one.pnl)
+
+    def test_unknown_client_lookup_does_not_add_client(self):
+        """Querying a client with no trades should not create an entry."""
+        tracker = PnLTracker()
+        tracker.on_trade(buyer_id=1, seller_id=2, price=1000, quantity=50)
+
+        assert tracker.get_client_pnl(3) is None
+        assert set(tracker.get_state()) == {1, 2}
+
+
+def _delta(delta_type: str, order_id: int, **fields) -> dict:
+    """
+    Build a delta row as read from deltas.csv (all values are strings).
+
+    Defaults describe client 100 resting BUY 50 @ 1000 at timestamp 100;
+    any column can be overridden by keyword.
+    """
+    delta = {
+        "timestamp": "100",
+        "delta_type": delta_type,
+        "order_id": str(order_id),
+        "client_id": "100",
+        "side": "BUY",
+        "price": "1000",
+        "quantity": "50",
+        "remaining_qty": "50",
+    }
+    delta.update((key, str(value)) for key, value in fields.items())
+    return delta
+
+
+# Shared read-only ADD row for order 1. apply_delta never mutates its input;
+# the proxy makes any accidental write fail instead of leaking across tests.
+_ADD_DELTA = MappingProxyType(_delta("ADD", 1))
+
+
+def _check_add(book: OrderBook) -> None:
+    """ADD delta should create an order in the book."""
+    order = book.get_order(1)
+    assert order is not None
+    assert order.order_id == 1
+    assert order.client_id == 100
+    assert order.price == 1000
+    assert order.quantity == 50
+    assert order.side == Side.BUY
+
+
+def _check_fill_partial(book: OrderBook) -> None:
+    """FILL delta with remaining > 0 should reduce quantity."""
+    order = book.get_order(1)
+    assert order is not None
+    assert order.quantity == 30
+
+
+def _check_order_removed(book: OrderBook) -> None:
+    """Complete FILL and CANCEL deltas should remove the order."""
+    assert book.get_order(1) is None
+
+
+def _check_modify(book: OrderBook) -> None:
+    """MODIFY delta should remove old order and add new one."""
+    # Old order should be gone
+    assert book.get_order(1) is None
+
+    # New order should exist
+    new_order = book.get_order(2)
+    assert new_order is not None
+    assert new_order.price == 1001
+
+
+# scenario -> (deltas applied after the ADD of order 1, checker)
+_REPLAY_SCENARIOS = {
+    "add": ((), _check_add),
+    "fill_partial": (
+        (_delta("FILL", 1, timestamp=200, quantity=20, remaining_qty=30),),
+        _check_fill_partial,
+    ),
+    "fill_complete": (
+        (_delta("FILL", 1, timestamp=200, remaining_qty=0),),
+        _check_order_removed,
+    ),
+    "cancel": ((_delta("CANCEL", 1, timestamp=200),), _check_order_removed),
+    # Price change = new order_id
+    "modify": (
+        (
+            _delta(
+                "MODIFY", 1, timestamp=200, new_order_id=2, new_price=1001, new_quantity=50
+            ),
+        ),
+        _check_modify,
+    ),
+}
+
 
 class TestOrderBookDeltaReplay:
     """Tests for OrderBook delta replay matching C++ behavior."""
 
-    def test_add_delta_creates_order(self):
-        """ADD delta should create an order in the book."""
-        book = OrderBook()
-
-        delta = {
-            "timestamp": "100",
-            "delta_type": "ADD",
-            "order_id": "1",
-            "client_id": "100",
-            "side": "BUY",
-            "price": "1000",
-            "quantity": "50",
-            "remaining_qty": "50",
-        }
+    @pytest.mark.parametrize("scenario", list(_REPLAY_SCENARIOS))
+    def test_delta_replay(self, fresh_book, scenario):
+        """Replay an ADD plus the scenario's deltas and check the result."""
+        follow_up, check = _REPLAY_SCENARIOS[scenario]
 
-        book.apply_delta(delta)
-
-        order = book.get_order(1)
-        assert order is not None
-        assert order.order_id == 1
-        assert order.client_id == 100
-        assert order.price == 1000
-        assert order.quantity == 50
-        assert order.side == Side.BUY
-
-    def test_fill_delta_partial(self):
-        """FILL delta with remaining > 0 should reduce quantity."""
-        book = OrderBook()
-
-        add_delta = {
-            "timestamp": "100",
-            "delta_type": "ADD",
-            "order_id": "1",
-            "client_id": "100",
-            "side": "BUY",
-            "price": "1000",
-            "quantity": "50",
-            "remaining_qty": "50",
-        }
-        book.apply_delta(add_delta)
-
-        # Partial fill
-        fill_delta = {
-            "timestamp": "200",
-            "delta_type": "FILL",
-            "order_id": "1",
-            "client_id": "100",
-            "side": "BUY",
-            "price": "1000",
-            "quantity": "20",
-            "remaining_qty": "30",
-        }
-        book.apply_delta(fill_delta)
-
-        order = book.get_order(1)
-        assert order is not None
-        assert order.quantity == 30
-
-    def test_fill_delta_complete(self):
-        """FILL delta with remaining = 0 should remove order."""
-        book = OrderBook()
-
-        add_delta = {
-            "timestamp": "100",
-            "delta_type": "ADD",
-            "order_id": "1",
-            "client_id": "100",
-            "side": "BUY",
-            "price": "1000",
-            "quantity": "50",
-            "remaining_qty": "50",
-        }
-        book.apply_delta(add_delta)
-
-        # Complete fill
-        fill_delta = {
-            "timestamp": "200",
-            "delta_type": "FILL",
-            "order_id": "1",
-            "client_id": "100",
-            "side": "BUY",
-            "price": "1000",
-            "quantity": "50",
-            "remaining_qty": "0",
-        }
-        book.apply_delta(fill_delta)
-
-        order = book.get_order(1)
-        assert order is None
-
-    def test_cancel_delta_removes_order(self):
-        """CANCEL delta should remove order from book."""
-        book = OrderBook()
-
-        # Add order
-        add_delta = {
-            "timestamp": "100",
-            "delta_type": "ADD",
-            "order_id": "1",
-            "client_id": "100",
-            "side": "BUY",
-            "price": "1000",
-            "quantity": "50",
-            "remaining_qty": "50",
-        }
-        book.apply_delta(add_delta)
-
-        # Cancel
-        cancel_delta = {
-            "timestamp": "200",
-            "delta_type": "CANCEL",
-            "order_id": "1",
-            "client_id": "100",
-            "side": "BUY",
-            "price": "1000",
-            "quantity": "50",
-            "remaining_qty": "50",
-        }
-        book.apply_delta(cancel_delta)
-
-        order = book.get_order(1)
-        assert order is None
-
-    def test_modify_delta_changes_order(self):
-        """MODIFY delta should remove old order and add new one."""
-        book = OrderBook()
-
-        # Add order
-        add_delta = {
-            "timestamp": "100",
-            "delta_type": "ADD",
-            "order_id": "1",
-            "client_id": "100",
-            "side": "BUY",
-            "price": "1000",
-            "quantity": "50",
-            "remaining_qty": "50",
-        }
-        book.apply_delta(add_delta)
-
-        # Modify (price change = new order_id)
-        modify_delta = {
-            "timestamp": "200",
-            "delta_type": "MODIFY",
-            "order_id": "1",
-            "client_id": "100",
-            "side": "BUY",
-            "price": "1000",
-            "quantity": "50",
-            "remaining_qty": "50",
-            "new_order_id": "2",
-            "new_price": "1001",
-            "new_quantity": "50",
-        }
-        book.apply_delta(modify_delta)
-
-        # Old order should be gone
-        assert book.get_order(1) is None
+        fresh_book.apply_delta(_ADD_DELTA)
+        for delta in follow_up:
+            fresh_book.apply_delta(delta)
 
-        # New order should exist
-        new_order = book.get_order(2)
-        assert new_order is not None
-        assert new_order.price == 1001
+        check(fresh_book)
 
 
 class TestFIFOOrderPreservation:
     """Tests for FIFO order preservation in price queues."""
 
-    def test_fifo_order_at_same_price(self):
+    def test_fifo_order_at_same_price(self, fresh_book):
         """Orders at same price should maintain FIFO order."""
-        book = OrderBook()
+        book = fresh_book
 
         # Add three orders at same price
         for i in range(1, 4):
-            delta = {
-                "timestamp": str(100 * i),
-                "delta_type": "ADD",
-                "order_id": str(i),
-                "client_id": str(100 + i),
-                "side": "BUY",
-                "price": "1000",
-                "quantity": "50",
-                "remaining_qty": "50",
-            }
-            book.apply_delta(delta)
+            book.apply_delta(_delta("ADD", i, timestamp=100 * i, client_id=100 + i))
 
         # Check FIFO order
         orders = book.get_orders_at_price(Side.BUY, 1000)
@@ -381,112 +331,41 @@ class TestCrossValidatorFileBasedIntegration:
     These tests create sample CSV files and validate the full pipeline.
     """
 
-    def test_validator_with_sample_data(
-        self, temp_test_dir, sample_deltas_content, sample_trades_content
-    ):
+    def test_validator_with_sample_data(self, validator):
         """Test validator with sample delta and trade files."""
-        # Write sample files
-        (temp_test_dir / "deltas.csv").write_text(sample_deltas_content)
-        (temp_test_dir / "trades.csv").write_text(sample_trades_content)
-
-        # Create states directory with expected states
-        states_dir = temp_test_dir / "states"
-        states_dir.mkdir()
-
-        # State 0: empty book
-        import json
-
-        state_0 = {
-            "timestamp": 0,
-            "sequence_num": 0,
-            "order_books": {"1": {"bids": [], "asks": []}},
-            "pnl": {},
-        }
-        (states_dir / "state_000000.json").write_text(json.dumps(state_0))
-
-        # State 1: after first ADD (buy order)
-        state_1 = {
-            "timestamp": 100,
-            "sequence_num": 1,
-            "order_books": {
-                "1": {
-                    "bids": [
-                        {
-                            "price": 1000,
-                            "orders": [
-                                {
-                                    "order_id": 1,
-                                    "client_id": 100,
-                                    "quantity": 50,
-                                    "price": 1000,
-                                    "timestamp": 100,
-                                    "side": "BUY",
-                                }
-                            ],
-                        }
-                    ],
-                    "asks": [],
-                }
-            },
-            "pnl": {},
-        }
-        (states_dir / "state_000001.json").write_text(json.dumps(state_1))
-
-        # State 2: after trade (both orders filled, book empty)
-        state_2 = {
-            "timestamp": 200,
-            "sequence_num": 2,
-            "order_books": {"1": {"bids": [], "asks": []}},
-            "pnl": {
-                "100": {"long_position": 50, "short_position": 0, "cash": -50000},
-                "101": {"long_position": 0, "short_position": 50, "cash": 50000},
-            },
-        }
-        (states_dir / "state_000002.json").write_text(json.dumps(state_2))
-
-        # Run validator
-        validator = CrossValidator(output_dir=temp_test_dir)
-        results = list(validator.validate_all())
+        # Run validator; only the first comparison is checked, so stop there
+        first = next(validator.validate_all(), None)
 
         # Check results
-        assert len(results) >= 1
+        assert first is not None
         # First state (empty) should match
-        assert results[0].match, f"State 0 mismatch: {results[0].differences}"
-
-
-class TestPnLConservation:
-    """Tests for P&L conservation invariants."""
+        assert first.match, f"State 0 mismatch: {first.differences}"
 
-    def test_cash_is_zero_sum(self):
-        """In a closed system, cash should sum to zero."""
-        tracker = PnLTracker()
+    def test_validator_reads_states_jsonl(self, sample_validator_dir, tmp_path):
+        """A single states.jsonl validates the same as states/state_*.json."""
+        from tools.testing.cross_validator import CrossValidator
 
-        # Simulate several trades
-        trades = [
-            (1, 2, 1000, 100),  # buyer_id, seller_id, price, qty
-            (3, 1, 1001, 50),
-            (2, 3, 999, 25),
-            (1, 3, 1000, 75),
-        ]
+        for name in ("deltas.csv", "trades.csv"):
+            (tmp_path / name).write_bytes((sample_validator_dir / name).read_bytes())
+        state_files = sorted((sample_validator_dir / "states").glob("state_*.json"))
+        (tmp_path / "states.jsonl").write_bytes(
+            b"".join(path.read_bytes() + b"\n" for path in state_files)
+        )
 
-        for buyer, seller, price, qty in trades:
-            tracker.on_trade(buyer, seller, price, qty)
+        from_dir = list(CrossValidator(output_dir=sample_validator_dir).validate_all())
+        from_jsonl = list(CrossValidator(output_dir=tmp_path).validate_all())
 
-        # Cash must sum to zero
-        assert tracker.total_cash() == 0, "Cash is not zero-sum"
+        assert len(from_jsonl) == len(state_files)
+        assert from_jsonl == from_dir
 
-    def test_positions_are_zero_sum(self):
-        """Net positions across all participants should sum to zero."""
-        tracker = PnLTracker()
 
-        trades = [
-            (1, 2, 1000, 100),
-            (3, 1, 1001, 50),
-            (2, 3, 999, 25),
-        ]
+class TestPnLConservation:
+    """Tests for P&L conservation invariants."""
 
-        for buyer, seller, price, qty in trades:
-            tracker.on_trade(buyer, seller, price, qty)
+    def test_cash_is_zero_sum(self, invariant_tracker):
+        """In a closed system, cash should sum to zero."""
+        assert invariant_tracker.total_cash() == 0, "Cash is not zero-sum"
 
-        # Net positions must sum to zero
-        assert tracker.total_net_position() == 0, "Net positions are not zero-sum"
+    def test_positions_are_zero_sum(self, invariant_tracker):
+        """Net positions across all participants should sum to zero."""
+        assert invariant_tracker.total_net_position() == 0, "Net positions are not zero-sum"
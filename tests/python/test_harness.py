@@ -2,13 +2,12 @@
 Tests for the cross-validation harness.
 """
 
-import json
-
 from tools.testing.harness import (
     CrossValidationHarness,
     HarnessResult,
     ValidationResult,
     ValidationStatus,
+    _validate_one,
 )
 
 
@@ -183,8 +182,7 @@ class TestCrossValidationHarness:
         test_dir.mkdir()
         (test_dir / "states").mkdir()
 
-        harness = CrossValidationHarness()
-        result = harness._validate_test_output(test_dir)
+        result = _validate_one(test_dir)
 
         assert result.status == ValidationStatus.ERROR
         assert "deltas.csv" in result.error_message
@@ -195,13 +193,12 @@ class TestCrossValidationHarness:
         test_dir.mkdir()
         (test_dir / "deltas.csv").write_text("timestamp,delta_type\n")
 
-        harness = CrossValidationHarness()
-        result = harness._validate_test_output(test_dir)
+        result = _validate_one(test_dir)
 
         assert result.status == ValidationStatus.ERROR
         assert "states" in result.error_message
 
-    def test_validate_test_output_success(self, tmp_path):
+    def test_validate_test_output_success(self, tmp_path, write_state_file):
         """Should return PASSED when validation succeeds."""
         test_dir = tmp_path / "test_0"
         test_dir.mkdir()
@@ -242,15 +239,14 @@ class TestCrossValidationHarness:
             },
             "pnl": {},
         }
-        (states_dir / "state_000001.json").write_text(json.dumps(state))
+        write_state_file(states_dir, 1, state)
 
-        harness = CrossValidationHarness()
-        result = harness._validate_test_output(test_dir)
+        result = _validate_one(test_dir)
 
         assert result.status == ValidationStatus.PASSED
         assert result.state_comparisons >= 1
 
-    def test_validate_test_output_mismatch(self, tmp_path):
+    def test_validate_test_output_mismatch(self, tmp_path, write_state_file):
         """Should return FAILED when state doesn't match."""
         test_dir = tmp_path / "test_0"
         test_dir.mkdir()
@@ -291,11 +287,27 @@ class TestCrossValidationHarness:
             },
             "pnl": {},
         }
-        (states_dir / "state_000001.json").write_text(json.dumps(state))
+        write_state_file(states_dir, 1, state)
 
-        harness = CrossValidationHarness()
-        result = harness._validate_test_output(test_dir)
+        result = _validate_one(test_dir)
 
         assert result.status == ValidationStatus.FAILED
         assert result.state_failures >= 1
         assert any("quantity" in d for d in result.differences)
+
+    def test_validate_test_outputs_parallel_keeps_order(self, tmp_path):
+        """Parallel validation should return results in test directory order."""
+        test_dirs = []
+        for i in range(3):
+            test_dir = tmp_path / f"test_{i}"
+            test_dir.mkdir()
+            if i != 1:
+                (test_dir / "deltas.csv").write_text("timestamp,delta_type\n")
+            test_dirs.append(test_dir)
+
+        serial = list(CrossValidationHarness(jobs=1)._validate_test_outputs(test_dirs))
+        parallel = list(CrossValidationHarness(jobs=2)._validate_test_outputs(test_dirs))
+
+        assert [r.name for r in parallel] == ["test_0", "test_1", "test_2"]
+        assert parallel == serial
+        assert "deltas.csv" in parallel[1].error_message
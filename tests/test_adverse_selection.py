@@ -7,11 +7,17 @@ that the Python analyzer produces correct results from that output.
 Each C++ scenario creates a known order flow with controlled fair prices.
 The Python side reads the output CSVs and checks exact expected values.
 
+The unit tests at the end run the analyzer on small hand-written CSVs and
+need no C++ build.
+
 Usage:
     pytest tests/test_adverse_selection.py -v
 """
 
+import csv
+import json
 import os
+import shutil
 import subprocess
 import tempfile
 from pathlib import Path
@@ -21,8 +27,10 @@ import pytest
 from tools.analyze_adverse_selection import (
     build_order_lifecycle,
     compute_mm_fills,
+    compute_summary,
     load_agent_map,
     load_fair_price_series,
+    write_per_fill_csv,
 )
 
 # ---------------------------------------------------------------------------
@@ -39,6 +47,22 @@ BINARY_NAME = "cross_validation_tests"
 # ---------------------------------------------------------------------------
 
 
+def _scenario_cache_dir(binary: Path) -> Path:
+    """On-disk cache location for scenario outputs of a given binary build."""
+    st = binary.stat()
+    key = f"{st.st_mtime_ns:x}-{st.st_size:x}"
+    cache_root = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache"))
+    return cache_root / "market-sim" / "as" / key
+
+
+def _sorted_test_dirs(output_dir: Path) -> list[Path]:
+    """Return test_N output directories sorted by N."""
+    return sorted(
+        [output_dir / d for d in os.listdir(output_dir) if d.startswith("test_")],
+        key=lambda p: int(p.name.split("_")[1]),
+    )
+
+
 @pytest.fixture(scope="session")
 def scenario_outputs():
     """
@@ -46,44 +70,59 @@ def scenario_outputs():
     and return list of test output dirs.
 
     Uses --gtest_filter to only run the AS scenarios, not the full
-    cross-validation suite.
+    cross-validation suite. Outputs are cached on disk keyed by the binary's
+    mtime and size, so reruns skip the subprocess until the binary is rebuilt.
     """
     binary = BUILD_DIR / BINARY_NAME
     if not binary.exists():
         pytest.skip(f"C++ binary not found at {binary}. Build with cmake first.")
 
-    with tempfile.TemporaryDirectory(prefix="as_test_") as tmpdir:
-        env = os.environ.copy()
-        env["AS_TEST_OUTPUT_DIR"] = tmpdir
+    cache_dir = _scenario_cache_dir(binary)
+    if (cache_dir / "test_0").is_dir():
+        return _sorted_test_dirs(cache_dir)
 
+    cache_dir.parent.mkdir(parents=True, exist_ok=True)
+    # Write into a scratch sibling and rename, so a failed run never
+    # leaves a partial cache entry behind.
+    tmpdir = Path(tempfile.mkdtemp(prefix="as_test_", dir=cache_dir.parent))
+    env = os.environ.copy()
+    env["AS_TEST_OUTPUT_DIR"] = str(tmpdir)
+
+    # gtest output goes to unnamed temp files and is only decoded on failure
+    with tempfile.TemporaryFile() as out, tempfile.TemporaryFile() as err:
         result = subprocess.run(
             [str(binary), "--gtest_filter=AdverseSelectionScenarioTest.*"],
             env=env,
-            capture_output=True,
-            text=True,
+            stdout=out,
+            stderr=err,
             timeout=30,
         )
 
         if result.returncode != 0:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+            out.seek(0)
+            err.seek(0)
             pytest.fail(
                 f"C++ test binary failed (rc={result.returncode}):\n"
-                f"stdout: {result.stdout}\nstderr: {result.stderr}"
+                f"stdout: {out.read().decode('utf-8', 'replace')}\n"
+                f"stderr: {err.read().decode('utf-8', 'replace')}"
             )
 
-        # Discover test directories in order
-        test_dirs = sorted(
-            [Path(tmpdir) / d for d in os.listdir(tmpdir) if d.startswith("test_")],
-            key=lambda p: int(p.name.split("_")[1]),
-        )
+    if not _sorted_test_dirs(tmpdir):
+        shutil.rmtree(tmpdir, ignore_errors=True)
+        pytest.fail("No test output directories found")
 
-        if not test_dirs:
-            pytest.fail("No test output directories found")
+    try:
+        tmpdir.rename(cache_dir)
+    except OSError:
+        # Another session populated the cache concurrently; use theirs.
+        shutil.rmtree(tmpdir, ignore_errors=True)
 
-        yield test_dirs
+    return _sorted_test_dirs(cache_dir)
 
 
 def run_analyzer(test_dir, mm_client_id=MM_CLIENT_ID, horizons=None):
-    """Run analyzer functions on a test directory, return list of MMFill."""
+    """Run analyzer functions on a test directory, return its MMFills."""
     if horizons is None:
         horizons = [100, 200]
 
@@ -208,3 +247,179 @@ def test_realized_as_with_changing_fair_price(scenario_outputs):
     # Realized AS at horizon 300: fair_price at first ts >= 200+300=500 → 900
     # realized_as = 900 - 1000 = -100
     assert fill.realized_as[300] == -100, f"Expected -100, got {fill.realized_as[300]}"
+
+
+# ---------------------------------------------------------------------------
+# Unit tests on hand-written CSVs (no C++ binary needed)
+# ---------------------------------------------------------------------------
+
+_DELTAS_HEADER = (
+    "timestamp,sequence_num,delta_type,order_id,client_id,instrument_id,side,price,"
+    "quantity,remaining_qty,trade_id,new_order_id,new_price,new_quantity\n"
+)
+
+# MM order 1 is re-quoted in place at t=300; MM order 2 is re-priced at t=350
+# into order 5, which is then re-quoted in place at t=450.
+_UNIT_DELTAS = _DELTAS_HEADER + """\
+100,0,ADD,1,10,1,BUY,1000,50,50,0,0,0,0
+150,1,ADD,2,10,1,SELL,1010,50,50,0,0,0,0
+200,2,ADD,3,20,1,BUY,990,10,10,0,0,0,0
+300,3,MODIFY,1,10,1,BUY,1000,50,0,0,0,0,40
+350,4,MODIFY,2,10,1,SELL,1010,50,0,0,5,1012,50
+450,5,MODIFY,5,10,1,SELL,1012,50,0,0,0,0,30
+"""
+
+_TRADES_HEADER = (
+    "timestamp,trade_id,instrument_id,buyer_id,seller_id,buyer_order_id,"
+    "seller_order_id,price,quantity,aggressor_side,fair_price\n"
+)
+
+_UNIT_TRADES = _TRADES_HEADER + """\
+500,1,1,10,20,1,4,1000,5,SELL,990
+600,2,1,30,10,6,5,1010,5,BUY,1030
+700,3,1,10,20,7,8,1020,5,BUY,1040
+800,4,1,10,20,99,9,1000,5,SELL,1040
+"""
+
+_UNIT_MARKET_STATE = """timestamp,instrument_id,fair_price
+0,1,1000
+500,1,990
+600,1,1030
+700,1,1040
+"""
+
+_UNIT_AGENTS = {
+    "agents": [
+        {"client_id": 10, "type": "MarketMaker"},
+        {"client_id": 20, "type": "NoiseTrader"},
+        {"client_id": 30, "type": "InformedTrader"},
+    ]
+}
+
+
+@pytest.fixture
+def unit_run_dir(tmp_path):
+    """Minimal simulator output directory for analyzer unit tests."""
+    (tmp_path / "deltas.csv").write_text(_UNIT_DELTAS)
+    (tmp_path / "trades.csv").write_text(_UNIT_TRADES)
+    (tmp_path / "market_state.csv").write_text(_UNIT_MARKET_STATE)
+    (tmp_path / "metadata.json").write_text(json.dumps(_UNIT_AGENTS))
+    return tmp_path
+
+
+def test_build_order_lifecycle_last_event_wins(unit_run_dir):
+    """MODIFY resets the clock; a re-priced order is born at its MODIFY."""
+    lifecycle = build_order_lifecycle(unit_run_dir / "deltas.csv")
+
+    assert dict(zip(lifecycle.order_ids.tolist(), lifecycle.birth_ts.tolist())) == {
+        1: 300,
+        2: 350,
+        3: 200,
+        5: 450,
+    }
+
+
+def test_compute_mm_fills_maker_only(unit_run_dir):
+    """Only resting MM fills on known orders are kept, with AS at each horizon."""
+    fills = run_analyzer(unit_run_dir)
+
+    assert [f.trade_id for f in fills] == [1, 2]
+
+    bought, sold = fills[0], fills[1]
+    assert bought.mm_side == "BUY"
+    assert bought.quote_age == 200  # fill at t=500, MODIFY at t=300
+    assert bought.immediate_as == -10  # 990 - 1000
+    assert bought.realized_as == {100: 30, 200: 40}  # 1030 - 1000, 1040 - 1000
+    assert bought.counterparty_type == "NoiseTrader"
+
+    assert sold.mm_side == "SELL"
+    assert sold.mm_order_id == 5
+    assert sold.quote_age == 150  # fill at t=600, MODIFY at t=450
+    assert sold.immediate_as == -20  # 1010 - 1030
+    # t=600+200 is past the end of the fair price series
+    assert sold.realized_as == {100: -30, 200: None}
+    assert sold.counterparty_type == "InformedTrader"
+
+
+def test_compute_summary_buckets(unit_run_dir):
+    """Bucket stats split fills by quote age and skip missing realized AS."""
+    fills = run_analyzer(unit_run_dir)
+
+    boundaries, (only,) = compute_summary(fills, [100, 200], num_buckets=1)
+    assert boundaries == []
+    assert only.count == 2
+    assert only.mean_immediate_as == -15.0
+    assert only.median_immediate_as == -15.0
+    assert only.mean_realized_as == {100: 0.0, 200: 40.0}
+    assert only.informed_pct == 50.0
+    assert only.mean_quote_age == 175.0
+
+    boundaries, stats = compute_summary(fills, [100, 200], num_buckets=3)
+    assert boundaries == [150, 200]
+    assert [bs.count for bs in stats] == [0, 1, 1]
+    assert stats[0].label == "[0, 150)"
+    assert stats[0].mean_realized_as == {100: None, 200: None}
+    assert stats[1].mean_immediate_as == -20.0
+    assert stats[1].mean_realized_as == {100: -30.0, 200: None}
+    assert stats[1].informed_pct == 100.0
+    assert stats[2].median_immediate_as == -10.0
+    assert stats[2].informed_pct == 0.0
+
+
+def test_write_per_fill_csv(unit_run_dir, tmp_path):
+    """Per-fill CSV has one row per fill, with blanks for missing realized AS."""
+    fills = run_analyzer(unit_run_dir)
+    out = tmp_path / "fills.csv"
+    write_per_fill_csv(fills, [100, 200], out)
+
+    with open(out, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+
+    assert rows == [
+        {
+            "fill_timestamp": "500",
+            "trade_id": "1",
+            "mm_order_id": "1",
+            "mm_side": "BUY",
+            "quote_age": "200",
+            "fill_price": "1000",
+            "fair_price": "990",
+            "immediate_as": "-10",
+            "realized_as_100": "30",
+            "realized_as_200": "40",
+            "counterparty_id": "20",
+            "counterparty_type": "NoiseTrader",
+        },
+        {
+            "fill_timestamp": "600",
+            "trade_id": "2",
+            "mm_order_id": "5",
+            "mm_side": "SELL",
+            "quote_age": "150",
+            "fill_price": "1010",
+            "fair_price": "1030",
+            "immediate_as": "-20",
+            "realized_as_100": "-30",
+            "realized_as_200": "",
+            "counterparty_id": "30",
+            "counterparty_type": "InformedTrader",
+        },
+    ]
+
+
+def test_empty_trades(unit_run_dir, tmp_path):
+    """A header-only trades.csv yields no fills, empty buckets and a header-only CSV."""
+    (unit_run_dir / "trades.csv").write_text(_TRADES_HEADER)
+
+    fills = run_analyzer(unit_run_dir)
+    assert len(fills) == 0
+    assert fills.realized_as.shape == (0, 2)
+
+    boundaries, stats = compute_summary(fills, [100, 200], num_buckets=2)
+    assert boundaries == []
+    assert [bs.count for bs in stats] == [0, 0]
+
+    out = tmp_path / "fills.csv"
+    write_per_fill_csv(fills, [100, 200], out)
+    with open(out, newline="", encoding="utf-8") as f:
+        assert len(list(csv.reader(f))) == 1
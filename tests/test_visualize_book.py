@@ -10,18 +10,21 @@ Tests cover:
 - Helper functions (best_bid, best_ask, spread, midpoint, depth)
 """
 
+import hashlib
 import os
-import tempfile
+from array import array
 
 import pytest
 
 from tools.visualizer.order_book import (
+    Delta,
     Order,
     OrderBook,
     Side,
 )
 
-from tools.visualize_book import DeltaIndex, read_deltas, reconstruct_at
+from tools import visualize_book
+from tools.visualize_book import DeltaIndex, read_delta_records, read_deltas, reconstruct_at
 
 
 # =============================================================================
@@ -29,12 +32,19 @@ from tools.visualize_book import DeltaIndex, read_deltas, reconstruct_at
 # =============================================================================
 
 
-@pytest.fixture
-def empty_book():
-    """Return an empty OrderBook."""
+@pytest.fixture(scope="session")
+def _shared_book():
+    """One OrderBook reused by every test that asks for an empty book."""
     return OrderBook()
 
 
+@pytest.fixture
+def empty_book(_shared_book):
+    """Return an empty OrderBook (the shared instance, reset via clear())."""
+    _shared_book.clear()
+    return _shared_book
+
+
 @pytest.fixture
 def sample_order():
     """Return a sample buy order."""
@@ -48,10 +58,7 @@ def sample_order():
     )
 
 
-@pytest.fixture
-def sample_deltas_file():
-    """Create a temporary deltas file with sample data."""
-    content = """timestamp,sequence_num,delta_type,order_id,client_id,instrument_id,side,price,quantity,remaining_qty,trade_id,new_order_id,new_price,new_quantity
+_SAMPLE_DELTAS_CSV = """timestamp,sequence_num,delta_type,order_id,client_id,instrument_id,side,price,quantity,remaining_qty,trade_id,new_order_id,new_price,new_quantity
 0,0,ADD,1,100,1,BUY,999,100,100,0,0,0,0
 0,1,ADD,2,101,1,SELL,1001,100,100,0,0,0,0
 10,2,ADD,3,102,1,BUY,998,50,50,0,0,0,0
@@ -60,32 +67,14 @@ def sample_deltas_file():
 40,5,CANCEL,3,102,1,BUY,998,50,50,0,0,0,0
 50,6,ADD,4,103,1,SELL,1002,80,80,0,0,0,0
 """
-    with tempfile.NamedTemporaryFile(mode="w", suffix=".csv", delete=False) as f:
-        f.write(content)
-        f.flush()
-        yield f.name
-    os.unlink(f.name)
-
 
-@pytest.fixture
-def modify_deltas_file():
-    """Create a deltas file with MODIFY operations."""
-    content = """timestamp,sequence_num,delta_type,order_id,client_id,instrument_id,side,price,quantity,remaining_qty,trade_id,new_order_id,new_price,new_quantity
+_MODIFY_DELTAS_CSV = """timestamp,sequence_num,delta_type,order_id,client_id,instrument_id,side,price,quantity,remaining_qty,trade_id,new_order_id,new_price,new_quantity
 0,0,ADD,1,100,1,BUY,999,100,100,0,0,0,0
 10,1,MODIFY,1,100,1,BUY,999,100,0,0,2,1000,80
 20,2,ADD,3,101,1,SELL,1005,50,50,0,0,0,0
 """
-    with tempfile.NamedTemporaryFile(mode="w", suffix=".csv", delete=False) as f:
-        f.write(content)
-        f.flush()
-        yield f.name
-    os.unlink(f.name)
-
 
-@pytest.fixture
-def complex_deltas_file():
-    """Create a deltas file with multiple operations at the same timestamp."""
-    content = """timestamp,sequence_num,delta_type,order_id,client_id,instrument_id,side,price,quantity,remaining_qty,trade_id,new_order_id,new_price,new_quantity
+_COMPLEX_DELTAS_CSV = """timestamp,sequence_num,delta_type,order_id,client_id,instrument_id,side,price,quantity,remaining_qty,trade_id,new_order_id,new_price,new_quantity
 0,0,ADD,1,100,1,BUY,999,100,100,0,0,0,0
 0,1,ADD,2,101,1,SELL,1001,100,100,0,0,0,0
 10,2,ADD,3,102,1,BUY,998,50,50,0,0,0,0
@@ -99,11 +88,47 @@ def complex_deltas_file():
 50,10,FILL,1,100,1,BUY,999,60,0,2,0,0,0
 50,11,FILL,9,107,1,SELL,999,60,0,2,0,0,0
 """
-    with tempfile.NamedTemporaryFile(mode="w", suffix=".csv", delete=False) as f:
-        f.write(content)
-        f.flush()
-        yield f.name
-    os.unlink(f.name)
+
+
+@pytest.fixture(scope="session")
+def deltas_files(tmp_path_factory):
+    """Write every read-only delta CSV once per session; map name -> path."""
+    directory = tmp_path_factory.mktemp("deltas")
+    files = {}
+    for name, content in (
+        ("sample", _SAMPLE_DELTAS_CSV),
+        ("modify", _MODIFY_DELTAS_CSV),
+        ("complex", _COMPLEX_DELTAS_CSV),
+    ):
+        path = directory / f"{name}.csv"
+        path.write_text(content)
+        files[name] = str(path)
+    return files
+
+
+@pytest.fixture
+def deltas_file(request, deltas_files):
+    """Path to the delta CSV named by the indirect parameter."""
+    return deltas_files[request.param]
+
+
+@pytest.fixture(scope="session")
+def sample_deltas_file(deltas_files):
+    """Deltas file with sample data."""
+    return deltas_files["sample"]
+
+
+@pytest.fixture(scope="session")
+def sample_deltas_index(sample_deltas_file):
+    """DeltaIndex over the sample file, built once; tests only read from it."""
+    with DeltaIndex(sample_deltas_file) as index:
+        yield index
+
+
+@pytest.fixture(scope="session")
+def complex_deltas_file(deltas_files):
+    """Deltas file with multiple operations at the same timestamp."""
+    return deltas_files["complex"]
 
 
 def make_delta(
@@ -119,39 +144,64 @@ def make_delta(
     new_price=0,
     new_quantity=0,
 ):
-    """Helper to create delta dicts for testing."""
-    return {
-        "timestamp": str(timestamp),
-        "delta_type": delta_type,
-        "order_id": str(order_id),
-        "client_id": str(client_id),
-        "side": side,
-        "price": str(price),
-        "quantity": str(quantity),
-        "remaining_qty": str(remaining_qty),
-        "new_order_id": str(new_order_id),
-        "new_price": str(new_price),
-        "new_quantity": str(new_quantity),
-    }
+    """Helper to create typed Delta records for testing."""
+    return Delta(
+        timestamp=timestamp,
+        delta_type=delta_type,
+        order_id=order_id,
+        client_id=client_id,
+        side=Side(side),
+        price=price,
+        quantity=quantity,
+        remaining_qty=remaining_qty,
+        new_order_id=new_order_id,
+        new_price=new_price,
+        new_quantity=new_quantity,
+    )
+
+
+def _digest_levels(h, levels):
+    """Feed (price, n_orders, order_id, qty, ...) for each level into h."""
+    for price, orders in levels.items():
+        flat = array("q", (price, len(orders)))
+        for o in orders:
+            flat.append(o.order_id)
+            flat.append(o.quantity)
+        h.update(flat.tobytes())
+    h.update(b"|")
 
 
 def get_book_state(book):
-    """Extract a comparable state representation from an OrderBook."""
-    bids = {}
-    for price in book.bids.keys():
-        orders = [(o.order_id, o.quantity) for o in book.bids[price]]
-        bids[price] = orders
+    """
+    Extract a comparable state fingerprint from an OrderBook.
+
+    Levels are digested in book order (price, then FIFO queue order), and
+    the registry in order_id order, so any difference in price level,
+    queue position, quantity or registry entry changes the digest.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    _digest_levels(h, book.bids)
+    _digest_levels(h, book.asks)
+    registry = book.registry
+    flat = array("q")
+    for order_id in sorted(registry):
+        price, side = registry[order_id]
+        flat.extend((order_id, price, side is Side.BUY))
+    h.update(flat.tobytes())
+
+    return {
+        "timestamp": book.timestamp,
+        "fingerprint": h.digest(),
+        "registry_size": len(registry),
+    }
 
-    asks = {}
-    for price in book.asks.keys():
-        orders = [(o.order_id, o.quantity) for o in book.asks[price]]
-        asks[price] = orders
 
+def readable_book_state(book):
+    """Full {price: [(order_id, qty), ...]} view of each side, for failure messages."""
     return {
         "timestamp": book.timestamp,
-        "bids": bids,
-        "asks": asks,
-        "registry": dict(book.registry),
+        "bids": {p: [(o.order_id, o.quantity) for o in q] for p, q in book.bids.items()},
+        "asks": {p: [(o.order_id, o.quantity) for o in q] for p, q in book.asks.items()},
     }
 
 
@@ -159,9 +209,8 @@ def states_equal(state1, state2):
     """Compare two book states for equality."""
     return (
         state1["timestamp"] == state2["timestamp"]
-        and state1["bids"] == state2["bids"]
-        and state1["asks"] == state2["asks"]
-        and state1["registry"] == state2["registry"]
+        and state1["registry_size"] == state2["registry_size"]
+        and state1["fingerprint"] == state2["fingerprint"]
     )
 
 
@@ -277,6 +326,20 @@ class TestOrderBookBasicOperations:
         prices = list(empty_book.asks.keys())
         assert prices == [1005, 1010, 1015]
 
+    def test_clear_resets_book(self, empty_book):
+        """Clearing should empty the book but keep bid/ask ordering."""
+        empty_book.apply_delta(make_delta(10, "ADD", 1, 100, "BUY", 1000, 50, 50))
+        empty_book.apply_delta(make_delta(10, "ADD", 2, 101, "SELL", 1010, 50, 50))
+
+        empty_book.clear()
+
+        assert states_equal(get_book_state(empty_book), get_book_state(OrderBook()))
+        assert empty_book.order_add_timestamps == {}
+
+        empty_book._add_order(Order(3, 100, Side.BUY, 1000, 50, 0))
+        empty_book._add_order(Order(4, 101, Side.BUY, 1005, 30, 0))
+        assert list(empty_book.bids.keys()) == [1005, 1000]
+
 
 # =============================================================================
 # Apply Delta Tests
@@ -298,6 +361,32 @@ class TestApplyDelta:
         assert order.quantity == 50
         assert empty_book.order_add_timestamps[1] == 10
 
+    def test_apply_rows_with_nan_new_fields(self, empty_book):
+        """Non-MODIFY rows with NaN new_* columns (archived parquet) should apply."""
+        nan = float("nan")
+
+        def row(ts, delta_type, order_id, quantity, remaining_qty):
+            return {
+                "timestamp": ts,
+                "delta_type": delta_type,
+                "order_id": order_id,
+                "client_id": 100,
+                "side": "BUY",
+                "price": 1000,
+                "quantity": quantity,
+                "remaining_qty": remaining_qty,
+                "new_order_id": nan,
+                "new_price": nan,
+                "new_quantity": nan,
+            }
+
+        empty_book.apply_delta(row(10, "ADD", 1, 5, 5))
+        assert empty_book.best_bid() == (1000, 5)
+
+        empty_book.apply_deltas([row(20, "ADD", 2, 7, 7), row(30, "FILL", 1, 5, 0)])
+        assert empty_book.best_bid() == (1000, 7)
+        assert empty_book.get_order(1) is None
+
     def test_apply_fill_partial(self, empty_book):
         """FILL delta with remaining > 0 should reduce quantity."""
         add_delta = make_delta(10, "ADD", 1, 100, "BUY", 999, 50, 50)
@@ -455,6 +544,38 @@ class TestApplyReverseDelta:
         assert old_order.price == 999
         assert old_order.quantity == 50
 
+    def test_apply_deltas_matches_apply_delta(self, complex_deltas_file):
+        """Batch application should match applying deltas one at a time."""
+        deltas = list(read_deltas(complex_deltas_file))
+
+        one_by_one = OrderBook()
+        for delta in deltas:
+            one_by_one.apply_delta(delta)
+
+        batched = OrderBook()
+        batched.apply_deltas(deltas)
+
+        assert states_equal(get_book_state(batched), get_book_state(one_by_one))
+
+    def test_apply_reverse_deltas_matches_apply_reverse_delta(self, complex_deltas_file):
+        """Batch reversal should match reversing deltas one at a time."""
+        with DeltaIndex(complex_deltas_file) as index:
+            last = len(index) - 1
+            deltas = index.read_deltas_at_index(last)
+            prev_ts = index.timestamps[last - 1]
+
+            one_by_one = index.book_at_index(last)
+            for delta in reversed(deltas):
+                one_by_one.apply_reverse_delta(delta, prev_ts)
+
+            batched = index.book_at_index(last)
+            batched.apply_reverse_deltas(deltas, prev_ts)
+
+            assert states_equal(get_book_state(batched), get_book_state(one_by_one))
+            assert states_equal(
+                get_book_state(batched), get_book_state(index.book_at_index(last - 1))
+            )
+
 
 # =============================================================================
 # Forward/Backward Consistency Tests (Critical)
@@ -520,81 +641,34 @@ class TestForwardBackwardConsistency:
                 expected_state, actual_state
             ), f"Mismatch after reversing delta {i}"
 
-    def test_file_based_forward_backward_consistency(self, sample_deltas_file):
-        """Test forward/backward consistency using file-based deltas."""
-        index = DeltaIndex(sample_deltas_file)
-        book = OrderBook()
-
-        all_delta_groups = []
-        all_states = [get_book_state(book)]
-
-        for i in range(len(index)):
-            deltas = index.read_deltas_at_index(i)
-            all_delta_groups.append(deltas)
-            for delta in deltas:
-                book.apply_delta(delta)
-            all_states.append(get_book_state(book))
-
-        for i in range(len(index) - 1, -1, -1):
-            prev_ts = index.timestamps[i - 1] if i > 0 else 0
-            for delta in reversed(all_delta_groups[i]):
-                book.apply_reverse_delta(delta, prev_timestamp=prev_ts)
-
-            expected = all_states[i]
-            actual = get_book_state(book)
-            assert states_equal(expected, actual), f"Mismatch at index {i}"
-
-    def test_modify_forward_backward(self, modify_deltas_file):
-        """Test forward/backward consistency with MODIFY operations."""
-        index = DeltaIndex(modify_deltas_file)
-        book = OrderBook()
-
-        all_delta_groups = []
-        all_states = [get_book_state(book)]
-
-        for i in range(len(index)):
-            deltas = index.read_deltas_at_index(i)
-            all_delta_groups.append(deltas)
-            for delta in deltas:
-                book.apply_delta(delta)
-            all_states.append(get_book_state(book))
-
-        for i in range(len(index) - 1, -1, -1):
-            prev_ts = index.timestamps[i - 1] if i > 0 else 0
-            for delta in reversed(all_delta_groups[i]):
-                book.apply_reverse_delta(delta, prev_timestamp=prev_ts)
-
-            expected = all_states[i]
-            actual = get_book_state(book)
-            assert states_equal(expected, actual), f"Mismatch at index {i}"
-
-    def test_complex_multi_delta_timestamps(self, complex_deltas_file):
-        """Test with multiple deltas at same timestamp (realistic scenario)."""
-        index = DeltaIndex(complex_deltas_file)
-        book = OrderBook()
+    @pytest.mark.parametrize(
+        "deltas_file", ["sample", "modify", "complex"], indirect=True
+    )
+    def test_file_based_forward_backward_consistency(self, deltas_file):
+        """Forward/backward consistency for each file (incl. MODIFY, multi-delta timestamps)."""
+        with DeltaIndex(deltas_file) as index:
+            book = OrderBook()
 
-        all_delta_groups = []
-        all_states = [get_book_state(book)]
+            all_delta_groups = []
+            all_states = [get_book_state(book)]
 
-        for i in range(len(index)):
-            deltas = index.read_deltas_at_index(i)
-            all_delta_groups.append(deltas)
-            for delta in deltas:
-                book.apply_delta(delta)
-            all_states.append(get_book_state(book))
+            for i in range(len(index)):
+                deltas = index.read_deltas_at_index(i)
+                all_delta_groups.append(deltas)
+                book.apply_deltas(deltas)
+                all_states.append(get_book_state(book))
 
-        for i in range(len(index) - 1, -1, -1):
-            prev_ts = index.timestamps[i - 1] if i > 0 else 0
-            for delta in reversed(all_delta_groups[i]):
-                book.apply_reverse_delta(delta, prev_timestamp=prev_ts)
+            for i in range(len(index) - 1, -1, -1):
+                prev_ts = index.timestamps[i - 1] if i > 0 else 0
+                book.apply_reverse_deltas(all_delta_groups[i], prev_timestamp=prev_ts)
 
-            expected = all_states[i]
-            actual = get_book_state(book)
-            assert states_equal(expected, actual), f"Mismatch at index {i}"
+                expected = all_states[i]
+                actual = get_book_state(book)
+                assert states_equal(expected, actual), f"Mismatch at index {i}"
 
-    def test_step_forward_backward_alternating(self, sample_deltas_file):
+    def test_step_forward_backward_alternating(self, sample_deltas_index):
         """Test alternating forward/backward steps like in interactive mode."""
-        index = DeltaIndex(sample_deltas_file)
+        index = sample_deltas_index
 
         book = OrderBook()
         deltas_0 = index.read_deltas_at_index(0)
@@ -632,16 +706,16 @@ class TestForwardBackwardConsistency:
 class TestDeltaIndex:
     """Tests for the DeltaIndex file indexer."""
 
-    def test_index_builds_correctly(self, sample_deltas_file):
+    def test_index_builds_correctly(self, sample_deltas_index):
         """Index should identify all unique timestamps."""
-        index = DeltaIndex(sample_deltas_file)
+        index = sample_deltas_index
 
         assert len(index) == 6
         assert index.timestamps == [0, 10, 20, 30, 40, 50]
 
-    def test_read_deltas_at_index(self, sample_deltas_file):
+    def test_read_deltas_at_index(self, sample_deltas_index):
         """Reading at an index should return correct deltas."""
-        index = DeltaIndex(sample_deltas_file)
+        index = sample_deltas_index
 
         deltas_at_0 = index.read_deltas_at_index(0)
         assert len(deltas_at_0) == 2
@@ -652,37 +726,75 @@ class TestDeltaIndex:
         assert deltas_at_1[0]["delta_type"] == "ADD"
         assert deltas_at_1[0]["order_id"] == "3"
 
-    def test_read_deltas_out_of_bounds(self, sample_deltas_file):
+    def test_read_deltas_out_of_bounds(self, sample_deltas_index):
         """Reading out of bounds should return empty list."""
-        index = DeltaIndex(sample_deltas_file)
+        index = sample_deltas_index
 
         assert index.read_deltas_at_index(-1) == []
         assert index.read_deltas_at_index(100) == []
 
-    def test_read_deltas_up_to_index(self, sample_deltas_file):
+    def test_read_deltas_up_to_index(self, sample_deltas_index):
         """Reading up to index should yield all deltas up to that timestamp."""
-        index = DeltaIndex(sample_deltas_file)
+        index = sample_deltas_index
 
         deltas = list(index.read_deltas_up_to_index(2))
         assert len(deltas) == 4
         assert deltas[0]["delta_type"] == "ADD"
         assert deltas[-1]["delta_type"] == "FILL"
 
-    def test_find_timestamp_index_exact(self, sample_deltas_file):
+    def test_close_releases_mapping(self, sample_deltas_file):
+        """Leaving the context manager should close the mapped file."""
+        with DeltaIndex(sample_deltas_file) as index:
+            assert len(index.read_deltas_at_index(0)) == 2
+
+        with pytest.raises(ValueError):
+            index.read_deltas_at_index(0)
+        index.close()  # idempotent
+
+    def test_find_timestamp_index_exact(self, sample_deltas_index):
         """Finding exact timestamp should return correct index."""
-        index = DeltaIndex(sample_deltas_file)
+        index = sample_deltas_index
 
         assert index.find_timestamp_index(0) == 0
         assert index.find_timestamp_index(20) == 2
         assert index.find_timestamp_index(50) == 5
 
-    def test_find_timestamp_index_closest(self, sample_deltas_file):
+    def test_find_timestamp_index_closest(self, sample_deltas_index):
         """Finding non-existent timestamp should return closest."""
-        index = DeltaIndex(sample_deltas_file)
+        index = sample_deltas_index
 
         assert index.find_timestamp_index(15) in [1, 2]
         assert index.find_timestamp_index(25) in [2, 3]
 
+    def test_find_timestamp_index_bounds_and_ties(self, sample_deltas_index):
+        """Out-of-range targets clamp to the ends; ties resolve to the earlier timestamp."""
+        index = sample_deltas_index
+
+        assert index.find_timestamp_index(-100) == 0
+        assert index.find_timestamp_index(1000) == len(index) - 1
+        assert index.find_timestamp_index(15) == 1
+        assert index.find_timestamp_index(16) == 2
+
+    def test_book_at_index_matches_full_replay(self, complex_deltas_file, monkeypatch):
+        """Snapshot-based rebuilds should match replaying from the start, in any order."""
+        monkeypatch.setattr(visualize_book, "SNAPSHOT_STRIDE", 2)
+        with DeltaIndex(complex_deltas_file) as index:
+            for idx in [4, 1, 3, 0, 4, 2]:
+                book = index.book_at_index(idx)
+                expected = reconstruct_at(complex_deltas_file, index.timestamps[idx])
+                assert states_equal(get_book_state(book), get_book_state(expected))
+                # Mutating a returned book must not leak into cached snapshots
+                book.clear()
+
+    def test_snapshot_replay_requires_iter_deltas_from(self):
+        """A replay subclass without _iter_deltas_from should fail at construction."""
+
+        class MissingDeltaSource(visualize_book._SnapshotReplay):
+            pass
+
+        with pytest.raises(TypeError, match="_iter_deltas_from"):
+            MissingDeltaSource()
+
 
 # =============================================================================
 # Helper Function Tests
@@ -779,6 +891,28 @@ class TestHelperFunctions:
         assert bid_levels[0][0] == 1000
         assert ask_levels[0][0] == 1010
 
+    def test_level_totals_track_forward_and_reverse_deltas(self, complex_deltas_file):
+        """Cached per-level quantities should equal the queue sums at every step."""
+
+        def summed_depth(book):
+            return (
+                [(p, sum(o.quantity for o in q)) for p, q in book.bids.items()],
+                [(p, sum(o.quantity for o in q)) for p, q in book.asks.items()],
+            )
+
+        with DeltaIndex(complex_deltas_file) as index:
+            book = OrderBook()
+            groups = []
+            for i in range(len(index)):
+                groups.append(index.read_deltas_at_index(i))
+                book.apply_deltas(groups[-1])
+                assert book.get_full_depth() == summed_depth(book)
+
+            for i in range(len(index) - 1, -1, -1):
+                prev_ts = index.timestamps[i - 1] if i > 0 else 0
+                book.apply_reverse_deltas(groups[i], prev_timestamp=prev_ts)
+                assert book.get_full_depth() == summed_depth(book)
+
     def test_get_full_depth(self, empty_book):
         """get_full_depth should return all levels."""
         for i in range(5):
@@ -959,6 +1093,18 @@ class TestRealDataFormat:
         assert first_delta["side"] == "BUY"
         assert first_delta["price"] == "999"
 
+    def test_delta_from_csv_row(self, sample_deltas_file):
+        """Delta.from_row should convert a CSV row to typed fields."""
+        first_row = next(iter(read_deltas(sample_deltas_file)))
+
+        assert Delta.from_row(first_row) == make_delta(0, "ADD", 1, 100, "BUY", 999, 100, 100)
+
+    def test_read_delta_records_matches_from_row(self, complex_deltas_file):
+        """Positional parsing should give the same Deltas as Delta.from_row."""
+        expected = [Delta.from_row(row) for row in read_deltas(complex_deltas_file)]
+
+        assert list(read_delta_records(complex_deltas_file)) == expected
+
     def test_full_replay_gives_consistent_results(self, sample_deltas_file):
         """Full replay should give same result as reconstruct_at."""
         final_timestamp = 50
@@ -997,45 +1143,39 @@ class TestActualDeltasFile:
 
     def test_full_forward_backward_consistency(self, actual_deltas_path):
         """Full forward then backward scan should return to original state at each step."""
-        index = DeltaIndex(actual_deltas_path)
-
-        def snapshot(book):
-            bids = {}
-            for p in book.bids.keys():
-                bids[p] = [(o.order_id, o.quantity) for o in book.bids[p]]
-            asks = {}
-            for p in book.asks.keys():
-                asks[p] = [(o.order_id, o.quantity) for o in book.asks[p]]
-            return (book.timestamp, dict(book.registry), bids, asks)
-
-        book = OrderBook()
-        states = [snapshot(book)]
-        all_delta_groups = []
-
-        # Build forward
-        for i in range(len(index)):
-            deltas = index.read_deltas_at_index(i)
-            all_delta_groups.append(deltas)
-            for delta in deltas:
-                book.apply_delta(delta)
-            states.append(snapshot(book))
-
-        # Reverse back
-        mismatches = []
-        for i in range(len(index) - 1, -1, -1):
-            prev_ts = index.timestamps[i - 1] if i > 0 else 0
-            for delta in reversed(all_delta_groups[i]):
-                book.apply_reverse_delta(delta, prev_timestamp=prev_ts)
-
-            expected = states[i]
-            actual = snapshot(book)
-
-            if expected != actual:
-                mismatches.append(i)
-
-        assert (
-            len(mismatches) == 0
-        ), f"State mismatches at indices: {mismatches[:10]}..."
+        with DeltaIndex(actual_deltas_path) as index:
+            book = OrderBook()
+            states = [get_book_state(book)]
+            all_delta_groups = []
+
+            # Build forward
+            for i in range(len(index)):
+                deltas = index.read_deltas_at_index(i)
+                all_delta_groups.append(deltas)
+                book.apply_deltas(deltas)
+                states.append(get_book_state(book))
+
+            # Reverse back; digests are compared, and readable books are only
+            # built for the first few mismatches
+            mismatches = []
+            details = []
+            for i in range(len(index) - 1, -1, -1):
+                prev_ts = index.timestamps[i - 1] if i > 0 else 0
+                book.apply_reverse_deltas(all_delta_groups[i], prev_timestamp=prev_ts)
+
+                if not states_equal(states[i], get_book_state(book)):
+                    mismatches.append(i)
+                    if len(details) < 3:
+                        expected = index.book_at_index(i - 1) if i > 0 else OrderBook()
+                        details.append(
+                            f"index {i}:\n"
+                            f"  expected {readable_book_state(expected)}\n"
+                            f"  actual   {readable_book_state(book)}"
+                        )
+
+            assert not mismatches, (
+                f"State mismatches at indices: {mismatches[:10]}...\n" + "\n".join(details)
+            )
 
 
 if __name__ == "__main__":
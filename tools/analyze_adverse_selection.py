@@ -15,15 +15,13 @@ Usage:
 """
 
 import argparse
-import bisect
 import csv
 import json
-import statistics
+import warnings
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Optional
 
-import matplotlib.pyplot as plt
 import numpy as np
 
 from tools.db import reader as db_reader
@@ -51,6 +49,104 @@ class MMFill:
     counterparty_type: str
 
 
+# mm_side codes in MMFills
+SIDE_BUY = 0
+SIDE_SELL = 1
+_SIDE_NAMES = ("BUY", "SELL")
+
+# realized_as cell value when fill_timestamp + horizon is past the fair price series
+REALIZED_AS_MISSING = np.iinfo(np.int64).min
+
+
+@dataclass
+class MMFills:
+    """
+    MM maker fills stored column-wise, one NumPy array per MMFill field.
+
+    realized_as is an (n_fills, len(horizons)) int64 array with
+    REALIZED_AS_MISSING where the horizon runs past the fair price series.
+    Counterparty types are stored as codes into counterparty_types.
+    Indexing or iterating yields MMFill records.
+    """
+
+    fill_timestamp: np.ndarray
+    trade_id: np.ndarray
+    mm_order_id: np.ndarray
+    mm_side: np.ndarray  # uint8, SIDE_BUY or SIDE_SELL
+    quote_age: np.ndarray
+    fill_price: np.ndarray
+    fair_price: np.ndarray
+    immediate_as: np.ndarray
+    realized_as: np.ndarray
+    horizons: list[int]
+    counterparty_id: np.ndarray
+    counterparty_type_code: np.ndarray  # int32 index into counterparty_types
+    counterparty_types: list[str]
+
+    def __len__(self) -> int:
+        return len(self.fill_timestamp)
+
+    def __getitem__(self, i: int) -> MMFill:
+        realized = self.realized_as[i].tolist()
+        return MMFill(
+            fill_timestamp=int(self.fill_timestamp[i]),
+            trade_id=int(self.trade_id[i]),
+            mm_order_id=int(self.mm_order_id[i]),
+            mm_side=_SIDE_NAMES[self.mm_side[i]],
+            quote_age=int(self.quote_age[i]),
+            fill_price=int(self.fill_price[i]),
+            fair_price=int(self.fair_price[i]),
+            immediate_as=int(self.immediate_as[i]),
+            realized_as={
+                h: (None if v == REALIZED_AS_MISSING else v)
+                for h, v in zip(self.horizons, realized)
+            },
+            counterparty_id=int(self.counterparty_id[i]),
+            counterparty_type=self.counterparty_types[self.counterparty_type_code[i]],
+        )
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def counterparty_type_names(self) -> np.ndarray:
+        """Per-fill counterparty type names as an object array."""
+        return np.asarray(self.counterparty_types, dtype=object)[self.counterparty_type_code]
+
+
+@dataclass
+class OrderLifecycle:
+    """
+    order_id -> most recent ADD/MODIFY timestamp, as sorted parallel arrays.
+
+    Lookups are one np.searchsorted over all requested order ids instead of
+    a dict.get per fill.
+    """
+
+    order_ids: np.ndarray  # sorted, unique
+    birth_ts: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.order_ids)
+
+    @classmethod
+    def from_dict(cls, lifecycle: dict[int, int]) -> "OrderLifecycle":
+        order_ids = np.fromiter(lifecycle.keys(), np.int64, len(lifecycle))
+        birth_ts = np.fromiter(lifecycle.values(), np.int64, len(lifecycle))
+        order = np.argsort(order_ids)
+        return cls(order_ids[order], birth_ts[order])
+
+    def lookup(self, order_ids: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Return (birth_ts, found) for each order id.
+
+        birth_ts is only meaningful where found is True.
+        """
+        if not len(self.order_ids):
+            return np.zeros(len(order_ids), np.int64), np.zeros(len(order_ids), bool)
+        idx = np.minimum(np.searchsorted(self.order_ids, order_ids), len(self.order_ids) - 1)
+        return self.birth_ts[idx], self.order_ids[idx] == order_ids
+
+
 @dataclass
 class AgentInfo:
     """Agent metadata from metadata.json."""
@@ -69,6 +165,7 @@ class BucketStats:
     median_immediate_as: float
     mean_realized_as: dict[int, Optional[float]]
     informed_pct: float
+    mean_quote_age: float = 0.0
 
 
 # ---------------------------------------------------------------------------
@@ -97,7 +194,35 @@ def find_market_makers(agent_map: dict[int, AgentInfo]) -> list[int]:
     ]
 
 
-def build_order_lifecycle(deltas_path: Path) -> dict[int, int]:
+def _read_csv_columns(path: Path, columns: dict[str, object]) -> np.ndarray:
+    """
+    Read selected columns of a simulator CSV into a structured array.
+
+    Args:
+        path: CSV file with a header row.
+        columns: Column name -> dtype (np.int64, or e.g. "U8" for short strings).
+
+    Returns:
+        Structured array with one field per requested column, in file order.
+        Columns are located by header name; parsing is done by NumPy's C
+        reader, so no per-row dicts or int() calls are made in Python.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        header = f.readline().rstrip("\r\n").split(",")
+        positions = [header.index(name) for name in columns]
+        with warnings.catch_warnings():
+            # A header-only file is a valid empty input
+            warnings.simplefilter("ignore", UserWarning)
+            return np.loadtxt(
+                f,
+                delimiter=",",
+                usecols=positions,
+                dtype=list(columns.items()),
+                ndmin=1,
+            )
+
+
+def build_order_lifecycle(deltas_path: Path) -> OrderLifecycle:
     """
     Scan deltas.csv to build order_id -> most recent ADD/MODIFY timestamp.
 
@@ -105,41 +230,48 @@ def build_order_lifecycle(deltas_path: Path) -> dict[int, int]:
     A MODIFY with a price change creates a new order (new_order_id), so we
     also register the new_order_id with the MODIFY timestamp.
     """
-    lifecycle: dict[int, int] = {}
-    with open(deltas_path, "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            delta_type = row["delta_type"]
-            if delta_type == "ADD":
-                order_id = int(row["order_id"])
-                timestamp = int(row["timestamp"])
-                lifecycle[order_id] = timestamp
-            elif delta_type == "MODIFY":
-                timestamp = int(row["timestamp"])
-                order_id = int(row["order_id"])
-                lifecycle[order_id] = timestamp
-                # Price-change MODIFYs create a replacement order with new_order_id
-                new_order_id = int(row["new_order_id"])
-                if new_order_id != 0:
-                    lifecycle[new_order_id] = timestamp
-    return lifecycle
-
-
-def load_fair_price_series(market_state_path: Path) -> tuple[list[int], list[int]]:
+    deltas = _read_csv_columns(
+        deltas_path,
+        {
+            "timestamp": np.int64,
+            "delta_type": "U8",
+            "order_id": np.int64,
+            "new_order_id": np.int64,
+        },
+    )
+    delta_type = deltas["delta_type"]
+    is_modify = delta_type == "MODIFY"
+    touched = (delta_type == "ADD") | is_modify
+    # Price-change MODIFYs create a replacement order with new_order_id
+    replaced = is_modify & (deltas["new_order_id"] != 0)
+
+    # Interleave (order_id, ts) and (new_order_id, ts) events in file order so
+    # that the last write per order wins, as a row-by-row scan would.
+    rows = np.arange(len(deltas), dtype=np.int64)
+    keys = np.concatenate((rows[touched] * 2, rows[replaced] * 2 + 1))
+    order_ids = np.concatenate((deltas["order_id"][touched], deltas["new_order_id"][replaced]))
+    timestamps = np.concatenate((deltas["timestamp"][touched], deltas["timestamp"][replaced]))
+    order = np.argsort(keys, kind="stable")[::-1]
+    # np.unique keeps the first occurrence, i.e. the last event in file order
+    unique_ids, first = np.unique(order_ids[order], return_index=True)
+    return OrderLifecycle(unique_ids, timestamps[order][first])
+
+
+def load_fair_price_series(market_state_path: Path) -> tuple[np.ndarray, np.ndarray]:
     """
     Load sorted (timestamp, fair_price) arrays from market_state.csv.
 
     Returns:
-        (timestamps, fair_prices) - parallel sorted lists for bisect lookups.
+        (timestamps, fair_prices) - parallel sorted int64 arrays for
+        searchsorted lookups.
     """
-    timestamps: list[int] = []
-    fair_prices: list[int] = []
-    with open(market_state_path, "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            timestamps.append(int(row["timestamp"]))
-            fair_prices.append(int(row["fair_price"]))
-    return timestamps, fair_prices
+    market_state = _read_csv_columns(
+        market_state_path, {"timestamp": np.int64, "fair_price": np.int64}
+    )
+    return (
+        np.ascontiguousarray(market_state["timestamp"]),
+        np.ascontiguousarray(market_state["fair_price"]),
+    )
 
 
 # ---------------------------------------------------------------------------
@@ -157,7 +289,7 @@ def load_agent_map_db(run_id: str, conn_str: str) -> dict[int, AgentInfo]:
     return agent_map
 
 
-def build_order_lifecycle_db(run_id: str, conn_str: str) -> dict[int, int]:
+def build_order_lifecycle_db(run_id: str, conn_str: str) -> OrderLifecycle:
     """
     Build order_id -> most recent ADD/MODIFY timestamp from the DB.
 
@@ -174,16 +306,14 @@ def build_order_lifecycle_db(run_id: str, conn_str: str) -> dict[int, int]:
             new_order_id = int(delta["new_order_id"])
             if new_order_id != 0:
                 lifecycle[new_order_id] = ts
-    return lifecycle
+    return OrderLifecycle.from_dict(lifecycle)
 
 
-def load_fair_price_series_db(
-    run_id: str, conn_str: str
-) -> tuple[list[int], list[int]]:
-    """Load (timestamps, fair_prices) parallel lists from the market_state table."""
+def load_fair_price_series_db(run_id: str, conn_str: str) -> tuple[np.ndarray, np.ndarray]:
+    """Load (timestamps, fair_prices) parallel int64 arrays from the market_state table."""
     rows = db_reader.load_market_state(run_id, conn_str)
-    timestamps = [int(r["timestamp"]) for r in rows]
-    fair_prices = [int(r["fair_price"]) for r in rows]
+    timestamps = np.fromiter((r["timestamp"] for r in rows), np.int64, len(rows))
+    fair_prices = np.fromiter((r["fair_price"] for r in rows), np.int64, len(rows))
     return timestamps, fair_prices
 
 
@@ -191,97 +321,156 @@ def compute_mm_fills_db(
     run_id: str,
     conn_str: str,
     mm_client_id: int,
-    order_lifecycle: dict[int, int],
-    ts_list: list[int],
-    fp_list: list[int],
+    order_lifecycle: OrderLifecycle,
+    ts_list: np.ndarray,
+    fp_list: np.ndarray,
     agent_map: dict[int, AgentInfo],
     horizons: list[int],
-) -> list[MMFill]:
+) -> MMFills:
     """
     Compute MM maker fills from the PostgreSQL trades table.
 
     Mirrors compute_mm_fills() but reads from the DB instead of trades.csv.
-    The returned list is identical in structure so all downstream analysis
+    The returned fills are identical in structure so all downstream analysis
     functions work unchanged.
     """
-    fills: list[MMFill] = []
+    rows: list[tuple[int, ...]] = []
 
     for row in db_reader.load_trades(run_id, conn_str):
         aggressor_side = row["aggressor_side"]
         buyer_id = int(row["buyer_id"])
         seller_id = int(row["seller_id"])
-        buyer_order_id = int(row["buyer_order_id"])
-        seller_order_id = int(row["seller_order_id"])
 
         if aggressor_side == "BUY" and seller_id == mm_client_id:
-            mm_order_id = seller_order_id
-            mm_side = "SELL"
+            mm_order_id = int(row["seller_order_id"])
+            mm_side = SIDE_SELL
             counterparty_id = buyer_id
         elif aggressor_side == "SELL" and buyer_id == mm_client_id:
-            mm_order_id = buyer_order_id
-            mm_side = "BUY"
+            mm_order_id = int(row["buyer_order_id"])
+            mm_side = SIDE_BUY
             counterparty_id = seller_id
         else:
             continue
 
-        fill_timestamp = int(row["timestamp"])
-        fill_price = int(row["price"])
-        fair_price = int(row["fair_price"])
-        trade_id = int(row["trade_id"])
+        rows.append(
+            (
+                int(row["timestamp"]),
+                int(row["trade_id"]),
+                mm_order_id,
+                mm_side,
+                int(row["price"]),
+                int(row["fair_price"]),
+                counterparty_id,
+            )
+        )
 
-        birth_ts = order_lifecycle.get(mm_order_id)
-        if birth_ts is None:
-            continue
-        quote_age = fill_timestamp - birth_ts
+    columns = np.array(rows, dtype=np.int64).reshape(-1, 7)
+    birth_ts, known = order_lifecycle.lookup(columns[:, 2])
+    fill_ts, trade_id, mm_order_id, mm_side, price, fair_price, counterparty_id = (
+        columns[known].T.copy()
+    )
+    return _assemble_fills(
+        fill_ts,
+        trade_id,
+        mm_order_id,
+        mm_side,
+        birth_ts[known],
+        price,
+        fair_price,
+        counterparty_id,
+        agent_map=agent_map,
+        ts_list=ts_list,
+        fp_list=fp_list,
+        horizons=horizons,
+    )
 
-        if mm_side == "BUY":
-            immediate_as = fair_price - fill_price
-        else:
-            immediate_as = fill_price - fair_price
 
-        realized_as: dict[int, Optional[int]] = {}
-        for h in horizons:
-            future_fp = lookup_fair_price_at(ts_list, fp_list, fill_timestamp + h)
-            if future_fp is not None:
-                if mm_side == "BUY":
-                    realized_as[h] = future_fp - fill_price
-                else:
-                    realized_as[h] = fill_price - future_fp
-            else:
-                realized_as[h] = None
-
-        cp_info = agent_map.get(counterparty_id)
-        counterparty_type = cp_info.agent_type if cp_info else "Unknown"
-
-        fills.append(
-            MMFill(
-                fill_timestamp=fill_timestamp,
-                trade_id=trade_id,
-                mm_order_id=mm_order_id,
-                mm_side=mm_side,
-                quote_age=quote_age,
-                fill_price=fill_price,
-                fair_price=fair_price,
-                immediate_as=immediate_as,
-                realized_as=realized_as,
-                counterparty_id=counterparty_id,
-                counterparty_type=counterparty_type,
-            )
-        )
+def compute_realized_as(
+    ts_list: np.ndarray,
+    fp_list: np.ndarray,
+    fill_timestamp: np.ndarray,
+    fill_price: np.ndarray,
+    mm_side: np.ndarray,
+    horizons: list[int],
+) -> np.ndarray:
+    """
+    Realized adverse selection for every fill and horizon in one batched lookup.
 
-    return fills
+    The fair price at the first timestamp >= fill_timestamp + h is found for
+    all (fill, horizon) pairs with a single np.searchsorted call, instead of
+    one bisect per pair.
 
+    Returns:
+        (n_fills, len(horizons)) int64 array; horizons past the end of the
+        series hold REALIZED_AS_MISSING.
+    """
+    ts = np.asarray(ts_list, dtype=np.int64)
+    fp = np.asarray(fp_list, dtype=np.int64)
 
-def lookup_fair_price_at(
-    ts_list: list[int],
-    fp_list: list[int],
-    target_ts: int,
-) -> Optional[int]:
-    """Find fair price at first timestamp >= target_ts via binary search."""
-    idx = bisect.bisect_left(ts_list, target_ts)
-    if idx < len(ts_list):
-        return fp_list[idx]
-    return None
+    idx = np.searchsorted(ts, fill_timestamp[:, None] + np.asarray(horizons, np.int64))
+    if len(ts):
+        future_fp = fp[np.minimum(idx, len(ts) - 1)]
+    else:
+        future_fp = np.zeros_like(idx)
+    # BUY: future - fill; SELL: fill - future
+    diff = future_fp - fill_price[:, None]
+    realized = np.where((mm_side == SIDE_BUY)[:, None], diff, -diff)
+    realized[idx >= len(ts)] = REALIZED_AS_MISSING
+    return realized
+
+
+def _assemble_fills(
+    fill_timestamp: np.ndarray,
+    trade_id: np.ndarray,
+    mm_order_id: np.ndarray,
+    mm_side: np.ndarray,
+    birth_ts: np.ndarray,
+    fill_price: np.ndarray,
+    fair_price: np.ndarray,
+    counterparty_id: np.ndarray,
+    *,
+    agent_map: dict[int, AgentInfo],
+    ts_list: np.ndarray,
+    fp_list: np.ndarray,
+    horizons: list[int],
+) -> MMFills:
+    """Derive quote age, AS and counterparty types for selected maker fills."""
+    mm_side = mm_side.astype(np.uint8)
+
+    # Immediate adverse selection: BUY: fair - fill; SELL: fill - fair
+    diff = fair_price - fill_price
+    immediate_as = np.where(mm_side == SIDE_BUY, diff, -diff)
+
+    # Counterparty type codes, resolved once per distinct counterparty
+    cp_ids, cp_index = np.unique(counterparty_id, return_inverse=True)
+    counterparty_types: list[str] = []
+    type_codes: dict[str, int] = {}
+    cp_codes = np.empty(len(cp_ids), dtype=np.int32)
+    for i, cid in enumerate(cp_ids.tolist()):
+        cp_info = agent_map.get(cid)
+        cp_type = cp_info.agent_type if cp_info else "Unknown"
+        if cp_type not in type_codes:
+            type_codes[cp_type] = len(counterparty_types)
+            counterparty_types.append(cp_type)
+        cp_codes[i] = type_codes[cp_type]
+
+    return MMFills(
+        fill_timestamp=fill_timestamp,
+        trade_id=trade_id,
+        mm_order_id=mm_order_id,
+        mm_side=mm_side,
+        quote_age=fill_timestamp - birth_ts,
+        fill_price=fill_price,
+        fair_price=fair_price,
+        immediate_as=immediate_as,
+        realized_as=compute_realized_as(
+            ts_list, fp_list, fill_timestamp, fill_price, mm_side, horizons
+        ),
+        horizons=list(horizons),
+        counterparty_id=counterparty_id,
+        counterparty_type_code=cp_codes[cp_index.reshape(-1)],
+        counterparty_types=counterparty_types,
+    )
 
 
 # ---------------------------------------------------------------------------
@@ -292,92 +481,62 @@ def lookup_fair_price_at(
 def compute_mm_fills(
     trades_path: Path,
     mm_client_id: int,
-    order_lifecycle: dict[int, int],
-    ts_list: list[int],
-    fp_list: list[int],
+    order_lifecycle: OrderLifecycle,
+    ts_list: np.ndarray,
+    fp_list: np.ndarray,
     agent_map: dict[int, AgentInfo],
     horizons: list[int],
-) -> list[MMFill]:
+) -> MMFills:
     """
     Process trades.csv to extract fills where the MM was the maker (resting side).
 
     For each qualifying fill, compute quote age, immediate adverse selection,
     and realized adverse selection at each horizon.
     """
-    fills: list[MMFill] = []
-
-    with open(trades_path, "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            aggressor_side = row["aggressor_side"]
-            buyer_id = int(row["buyer_id"])
-            seller_id = int(row["seller_id"])
-            buyer_order_id = int(row["buyer_order_id"])
-            seller_order_id = int(row["seller_order_id"])
-
-            # Determine if MM was the resting (maker) side
-            if aggressor_side == "BUY" and seller_id == mm_client_id:
-                mm_order_id = seller_order_id
-                mm_side = "SELL"
-                counterparty_id = buyer_id
-            elif aggressor_side == "SELL" and buyer_id == mm_client_id:
-                mm_order_id = buyer_order_id
-                mm_side = "BUY"
-                counterparty_id = seller_id
-            else:
-                continue
-
-            fill_timestamp = int(row["timestamp"])
-            fill_price = int(row["price"])
-            fair_price = int(row["fair_price"])
-            trade_id = int(row["trade_id"])
-
-            # Quote age
-            birth_ts = order_lifecycle.get(mm_order_id)
-            if birth_ts is None:
-                # Order not found in deltas — skip
-                continue
-            quote_age = fill_timestamp - birth_ts
-
-            # Immediate adverse selection
-            if mm_side == "BUY":
-                immediate_as = fair_price - fill_price
-            else:
-                immediate_as = fill_price - fair_price
-
-            # Realized adverse selection at each horizon
-            realized_as: dict[int, Optional[int]] = {}
-            for h in horizons:
-                future_fp = lookup_fair_price_at(ts_list, fp_list, fill_timestamp + h)
-                if future_fp is not None:
-                    if mm_side == "BUY":
-                        realized_as[h] = future_fp - fill_price
-                    else:
-                        realized_as[h] = fill_price - future_fp
-                else:
-                    realized_as[h] = None
-
-            # Counterparty type
-            cp_info = agent_map.get(counterparty_id)
-            counterparty_type = cp_info.agent_type if cp_info else "Unknown"
-
-            fills.append(
-                MMFill(
-                    fill_timestamp=fill_timestamp,
-                    trade_id=trade_id,
-                    mm_order_id=mm_order_id,
-                    mm_side=mm_side,
-                    quote_age=quote_age,
-                    fill_price=fill_price,
-                    fair_price=fair_price,
-                    immediate_as=immediate_as,
-                    realized_as=realized_as,
-                    counterparty_id=counterparty_id,
-                    counterparty_type=counterparty_type,
-                )
-            )
+    trades = _read_csv_columns(
+        trades_path,
+        {
+            "timestamp": np.int64,
+            "trade_id": np.int64,
+            "buyer_id": np.int64,
+            "seller_id": np.int64,
+            "buyer_order_id": np.int64,
+            "seller_order_id": np.int64,
+            "price": np.int64,
+            "aggressor_side": "U4",
+            "fair_price": np.int64,
+        },
+    )
 
-    return fills
+    # MM was the resting (maker) side: SELL hit by a BUY aggressor, or vice versa
+    aggressor_side = trades["aggressor_side"]
+    mm_sold = (aggressor_side == "BUY") & (trades["seller_id"] == mm_client_id)
+    mm_bought = (aggressor_side == "SELL") & (trades["buyer_id"] == mm_client_id)
+    is_maker = mm_sold | mm_bought
+    trades = trades[is_maker]
+    mm_sold = mm_sold[is_maker]
+
+    mm_order_id = np.where(mm_sold, trades["seller_order_id"], trades["buyer_order_id"])
+    counterparty_id = np.where(mm_sold, trades["buyer_id"], trades["seller_id"])
+
+    # Quote age; orders not found in deltas are skipped
+    birth_ts, known = order_lifecycle.lookup(mm_order_id)
+
+    # Quote age, immediate/realized AS and counterparty types, column-wise
+    return _assemble_fills(
+        np.ascontiguousarray(trades["timestamp"][known]),
+        np.ascontiguousarray(trades["trade_id"][known]),
+        mm_order_id[known],
+        np.where(mm_sold[known], SIDE_SELL, SIDE_BUY),
+        birth_ts[known],
+        np.ascontiguousarray(trades["price"][known]),
+        np.ascontiguousarray(trades["fair_price"][known]),
+        counterparty_id[known],
+        agent_map=agent_map,
+        ts_list=ts_list,
+        fp_list=fp_list,
+        horizons=horizons,
+    )
 
 
 # ---------------------------------------------------------------------------
@@ -385,23 +544,23 @@ def compute_mm_fills(
 # ---------------------------------------------------------------------------
 
 
-def compute_bucket_boundaries(fills: list[MMFill], num_buckets: int) -> list[int]:
+def compute_bucket_boundaries(fills: MMFills, num_buckets: int) -> list[int]:
     """Compute quartile-based bucket boundaries from observed quote ages."""
-    ages = sorted(f.quote_age for f in fills)
-    if not ages:
+    ages = np.sort(fills.quote_age)
+    if not len(ages):
         return []
     boundaries: list[int] = []
     for i in range(1, num_buckets):
         pct = i / num_buckets
         idx = int(pct * len(ages))
         idx = min(idx, len(ages) - 1)
-        boundaries.append(ages[idx])
+        boundaries.append(int(ages[idx]))
     return boundaries
 
 
-def assign_bucket(quote_age: int, boundaries: list[int]) -> int:
-    """Return the bucket index for a given quote age."""
-    return bisect.bisect_right(boundaries, quote_age)
+def assign_buckets(fills: MMFills, boundaries: list[int]) -> np.ndarray:
+    """Bucket index of every fill: the number of boundaries <= its quote age."""
+    return np.searchsorted(np.asarray(boundaries, dtype=np.int64), fills.quote_age, side="right")
 
 
 def bucket_label(idx: int, boundaries: list[int]) -> str:
@@ -417,7 +576,7 @@ def bucket_label(idx: int, boundaries: list[int]) -> str:
 
 
 def compute_summary(
-    fills: list[MMFill],
+    fills: MMFills,
     horizons: list[int],
     num_buckets: int,
 ) -> tuple[list[int], list[BucketStats]]:
@@ -428,19 +587,36 @@ def compute_summary(
         (boundaries, bucket_stats_list)
     """
     boundaries = compute_bucket_boundaries(fills, num_buckets)
+    bucket_idx = assign_buckets(fills, boundaries)
+    informed_types = np.asarray(fills.counterparty_types, dtype=object) == "InformedTrader"
+    is_informed = informed_types[fills.counterparty_type_code]
+
+    # Every bucket's count and sums in one bincount pass per column
+    def per_bucket(weights: Optional[np.ndarray] = None) -> list:
+        return np.bincount(bucket_idx, weights=weights, minlength=num_buckets).tolist()
+
+    counts = per_bucket()
+    imm_sums = per_bucket(fills.immediate_as.astype(np.float64))
+    age_sums = per_bucket(fills.quote_age.astype(np.float64))
+    informed_counts = per_bucket(is_informed.astype(np.float64))
+    realized_sums: dict[int, list] = {}
+    realized_counts: dict[int, list] = {}
+    for h in horizons:
+        col = fills.realized_as[:, fills.horizons.index(h)]
+        valid = col != REALIZED_AS_MISSING
+        realized_sums[h] = per_bucket(np.where(valid, col, 0).astype(np.float64))
+        realized_counts[h] = per_bucket(valid.astype(np.float64))
 
-    # Group fills by bucket
-    buckets: dict[int, list[MMFill]] = {}
-    for f in fills:
-        b = assign_bucket(f.quote_age, boundaries)
-        buckets.setdefault(b, []).append(f)
+    # Medians: sort by (bucket, immediate AS) once; each bucket is a contiguous run
+    sorted_imm = fills.immediate_as[np.lexsort((fills.immediate_as, bucket_idx))].tolist()
+    bucket_start = 0
 
     stats_list: list[BucketStats] = []
     for b_idx in range(num_buckets):
-        b_fills = buckets.get(b_idx, [])
+        count = counts[b_idx]
         label = bucket_label(b_idx, boundaries)
 
-        if not b_fills:
+        if not count:
             stats_list.append(
                 BucketStats(
                     label=label,
@@ -453,24 +629,24 @@ def compute_summary(
             )
             continue
 
-        imm_as_values = [f.immediate_as for f in b_fills]
+        lo = bucket_start + (count - 1) // 2
+        hi = bucket_start + count // 2
+        bucket_start += count
+
         mean_realized: dict[int, Optional[float]] = {}
         for h in horizons:
-            h_values = [f.realized_as[h] for f in b_fills if f.realized_as[h] is not None]
-            mean_realized[h] = statistics.mean(h_values) if h_values else None
-
-        informed_count = sum(
-            1 for f in b_fills if f.counterparty_type == "InformedTrader"
-        )
+            n = realized_counts[h][b_idx]
+            mean_realized[h] = realized_sums[h][b_idx] / n if n else None
 
         stats_list.append(
             BucketStats(
                 label=label,
-                count=len(b_fills),
-                mean_immediate_as=statistics.mean(imm_as_values),
-                median_immediate_as=statistics.median(imm_as_values),
+                count=count,
+                mean_immediate_as=imm_sums[b_idx] / count,
+                median_immediate_as=(sorted_imm[lo] + sorted_imm[hi]) / 2,
                 mean_realized_as=mean_realized,
-                informed_pct=(informed_count / len(b_fills)) * 100,
+                informed_pct=(informed_counts[b_idx] / count) * 100,
+                mean_quote_age=age_sums[b_idx] / count,
             )
         )
 
@@ -483,7 +659,7 @@ def compute_summary(
 
 
 def print_summary(
-    fills: list[MMFill],
+    fills: MMFills,
     mm_client_id: int,
     horizons: list[int],
     num_buckets: int,
@@ -494,9 +670,10 @@ def print_summary(
         return
 
     # Counterparty breakdown
-    cp_counts: dict[str, int] = {}
-    for f in fills:
-        cp_counts[f.counterparty_type] = cp_counts.get(f.counterparty_type, 0) + 1
+    type_counts = np.bincount(
+        fills.counterparty_type_code, minlength=len(fills.counterparty_types)
+    ).tolist()
+    cp_counts = dict(zip(fills.counterparty_types, type_counts))
 
     print(f"\nAdverse Selection Analysis (MM client_id={mm_client_id})")
     print("=" * 60)
@@ -535,7 +712,7 @@ def print_summary(
 
 
 def write_per_fill_csv(
-    fills: list[MMFill],
+    fills: MMFills,
     horizons: list[int],
     csv_path: Path,
 ) -> None:
@@ -554,27 +731,27 @@ def write_per_fill_csv(
         fieldnames.append(f"realized_as_{h}")
     fieldnames.extend(["counterparty_id", "counterparty_type"])
 
+    # Assemble the whole table column by column, then hand it to the C writer
+    n_horizons = len(horizons)
+    table = np.empty((len(fills), len(fieldnames)), dtype=object)
+    table[:, 0] = fills.fill_timestamp
+    table[:, 1] = fills.trade_id
+    table[:, 2] = fills.mm_order_id
+    table[:, 3] = np.asarray(_SIDE_NAMES, dtype=object)[fills.mm_side]
+    table[:, 4] = fills.quote_age
+    table[:, 5] = fills.fill_price
+    table[:, 6] = fills.fair_price
+    table[:, 7] = fills.immediate_as
+    realized = fills.realized_as[:, [fills.horizons.index(h) for h in horizons]]
+    table[:, 8 : 8 + n_horizons] = realized
+    table[:, 8 : 8 + n_horizons][realized == REALIZED_AS_MISSING] = ""
+    table[:, 8 + n_horizons] = fills.counterparty_id
+    table[:, 9 + n_horizons] = fills.counterparty_type_names()
+
     with open(csv_path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-
-        for fill in fills:
-            row = {
-                "fill_timestamp": fill.fill_timestamp,
-                "trade_id": fill.trade_id,
-                "mm_order_id": fill.mm_order_id,
-                "mm_side": fill.mm_side,
-                "quote_age": fill.quote_age,
-                "fill_price": fill.fill_price,
-                "fair_price": fill.fair_price,
-                "immediate_as": fill.immediate_as,
-            }
-            for h in horizons:
-                val = fill.realized_as[h]
-                row[f"realized_as_{h}"] = val if val is not None else ""
-            row["counterparty_id"] = fill.counterparty_id
-            row["counterparty_type"] = fill.counterparty_type
-            writer.writerow(row)
+        writer = csv.writer(f)
+        writer.writerow(fieldnames)
+        writer.writerows(table.tolist())
 
     print(f"Wrote {len(fills)} fills to {csv_path}")
 
@@ -585,7 +762,7 @@ def write_per_fill_csv(
 
 
 def plot_adverse_selection(
-    fills: list[MMFill],
+    fills: MMFills,
     horizons: list[int],
     num_buckets: int,
     mm_client_id: int,
@@ -600,6 +777,9 @@ def plot_adverse_selection(
         print("No data to plot.")
         return
 
+    # Imported here so non-plotting runs don't pay matplotlib's import cost
+    import matplotlib.pyplot as plt
+
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 6))
     fig.suptitle(
         f"Adverse Selection Analysis (MM client_id={mm_client_id})",
@@ -613,35 +793,27 @@ def plot_adverse_selection(
         "Unknown": "gray",
     }
 
-    # Plot scatter by counterparty type
-    by_type: dict[str, tuple[list[int], list[int]]] = {}
-    for f in fills:
-        by_type.setdefault(f.counterparty_type, ([], []))
-        by_type[f.counterparty_type][0].append(f.quote_age)
-        by_type[f.counterparty_type][1].append(f.immediate_as)
-
-    for cp_type, (ages, as_vals) in sorted(by_type.items()):
-        color = type_colors.get(cp_type, "gray")
-        ax1.scatter(
-            ages,
-            as_vals,
-            alpha=0.3,
-            s=10,
-            color=color,
-            label=cp_type,
-        )
+    # One scatter colored per point by counterparty type; empty labeled
+    # markers stand in for each type in the legend
+    type_color_list = [type_colors.get(t, "gray") for t in fills.counterparty_types]
+    ax1.scatter(
+        fills.quote_age,
+        fills.immediate_as,
+        alpha=0.3,
+        s=10,
+        c=np.asarray(type_color_list, dtype=object)[fills.counterparty_type_code].tolist(),
+    )
+    for cp_type, color in sorted(zip(fills.counterparty_types, type_color_list)):
+        ax1.plot([], [], "o", alpha=0.3, markersize=np.sqrt(10), color=color, label=cp_type)
 
     # Binned means overlay
-    boundaries, bucket_stats = compute_summary(fills, horizons, num_buckets)
+    _, bucket_stats = compute_summary(fills, horizons, num_buckets)
     bin_centers = []
     bin_means = []
-    for i, bs in enumerate(bucket_stats):
+    for bs in bucket_stats:
         if bs.count == 0:
             continue
-        # Compute bin center from fills in this bucket
-        b_fills = [f for f in fills if assign_bucket(f.quote_age, boundaries) == i]
-        center = statistics.mean(f.quote_age for f in b_fills)
-        bin_centers.append(center)
+        bin_centers.append(bs.mean_quote_age)
         bin_means.append(bs.mean_immediate_as)
 
     if bin_centers:
@@ -667,15 +839,13 @@ def plot_adverse_selection(
     for h in horizons:
         h_centers = []
         h_means = []
-        for i, bs in enumerate(bucket_stats):
+        for bs in bucket_stats:
             if bs.count == 0:
                 continue
             ras = bs.mean_realized_as.get(h)
             if ras is None:
                 continue
-            b_fills = [f for f in fills if assign_bucket(f.quote_age, boundaries) == i]
-            center = statistics.mean(f.quote_age for f in b_fills)
-            h_centers.append(center)
+            h_centers.append(bs.mean_quote_age)
             h_means.append(ras)
 
         if h_centers:
@@ -8,23 +8,40 @@ Orchestrates the full validation process:
 4. Reports any differences
 """
 
+import bisect
 import json
-import csv
+import os
+from operator import itemgetter
 from pathlib import Path
 from typing import Iterator, Optional
 
-from tools.visualizer.order_book import OrderBook
+try:
+    import orjson
+
+    _ORJSON_AVAILABLE = True
+except ImportError:
+    _ORJSON_AVAILABLE = False
+
+from tools.visualizer.order_book import Delta, OrderBook
 from tools.testing.state_comparator import StateComparator, ComparisonResult
 from tools.testing.pnl_tracker import PnLTracker
 
 
+def _load_json(data: bytes):
+    """Decode one JSON document, using orjson when it is installed."""
+    if _ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
 class CrossValidator:
     """
     Validates Python replay against C++ state exports.
 
-    The validator reads deltas.csv and state_*.json files produced by the
+    The validator reads deltas.csv and the state exports produced by the
     C++ test harness, replays the deltas in Python, and compares state
-    after each step.
+    after each step. States are read from states.jsonl (one JSON state per
+    line) when present, otherwise from states/state_*.json.
 
     Usage:
         validator = CrossValidator(
@@ -42,12 +59,16 @@ class CrossValidator:
         """
         Args:
             output_dir: Directory containing deltas.csv, trades.csv, and states/
+                (or states.jsonl)
             instrument_ids: List of instrument IDs to validate (default: [1])
         """
         self.output_dir = Path(output_dir)
         self.deltas_file = self.output_dir / "deltas.csv"
         self.trades_file = self.output_dir / "trades.csv"
         self.states_dir = self.output_dir / "states"
+        self.states_jsonl = self.output_dir / "states.jsonl"
+        self._state_files: Optional[list[tuple[int, str]]] = None
+        self._state_files_mtime: Optional[int] = None
         self.instrument_ids = instrument_ids or [1]
         self.comparator = StateComparator()
 
@@ -57,28 +78,99 @@ class CrossValidator:
         if not state_file.exists():
             return None
 
-        with open(state_file, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return _load_json(state_file.read_bytes())
+
+    def _list_state_files(self) -> list[tuple[int, str]]:
+        """
+        Return (sequence_num, file name) for state_*.json in states/, sorted by name.
 
-    def _read_deltas(self) -> Iterator[dict]:
-        """Read deltas from CSV file."""
+        Uses a single os.scandir pass; DirEntry answers is_file() from the
+        directory listing, so no per-file stat is needed. The result is
+        cached per instance and reused until the directory's mtime changes.
+        """
+        try:
+            mtime = os.stat(self.states_dir).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if self._state_files is None or mtime != self._state_files_mtime:
+            names: list[str] = []
+            if mtime is not None:
+                with os.scandir(self.states_dir) as entries:
+                    names = sorted(
+                        entry.name
+                        for entry in entries
+                        if entry.name.startswith("state_")
+                        and entry.name.endswith(".json")
+                        and entry.is_file()
+                    )
+            # state_<seq>.json -> seq
+            self._state_files = [(int(name[6:-5]), name) for name in names]
+            self._state_files_mtime = mtime
+        return self._state_files
+
+    def _iter_cpp_states(self) -> Iterator[tuple[int, Optional[dict]]]:
+        """
+        Yield (sequence_num, state) for each C++ state export, in order.
+
+        A single states.jsonl is read in one pass; otherwise each
+        states/state_*.json file is loaded in filename order. state is None
+        if a listed file has disappeared.
+        """
+        if self.states_jsonl.exists():
+            with open(self.states_jsonl, "rb") as f:
+                for line_num, line in enumerate(f):
+                    if line.strip():
+                        state = _load_json(line)
+                        yield state.get("sequence_num", line_num), state
+            return
+
+        for seq_num, _ in self._list_state_files():
+            yield seq_num, self._load_cpp_state(seq_num)
+
+    def _read_deltas(self) -> Iterator[tuple[int, int, int, Delta]]:
+        """
+        Read deltas.csv as (timestamp, sequence_num, instrument_id, Delta) rows.
+
+        Column positions are resolved from the header once and each line is
+        converted to typed values a single time (Delta.parser), rather than
+        re-parsing string fields on every sort key and comparison.
+        """
         if not self.deltas_file.exists():
             return
 
         with open(self.deltas_file, "r", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                yield row
+            header = f.readline().strip().split(",")
+            parse = Delta.parser(header)
+            i_seq = header.index("sequence_num")
+            i_inst = header.index("instrument_id") if "instrument_id" in header else None
+            for line in f:
+                fields = line.strip().split(",")
+                if fields == [""]:
+                    continue
+                delta = parse(fields)
+                inst_id = int(fields[i_inst]) if i_inst is not None else 1
+                yield delta.timestamp, int(fields[i_seq]), inst_id, delta
+
+    def _read_trades(self) -> Iterator[tuple[int, int, int, int, int]]:
+        """
+        Read trades.csv as (timestamp, buyer_id, seller_id, price, quantity) rows.
 
-    def _read_trades(self) -> Iterator[dict]:
-        """Read trades from CSV file."""
+        Only the columns needed for P&L are converted, by header position.
+        """
         if not self.trades_file.exists():
             return
 
         with open(self.trades_file, "r", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                yield row
+            header = f.readline().strip().split(",")
+            columns = [
+                header.index(name)
+                for name in ("timestamp", "buyer_id", "seller_id", "price", "quantity")
+            ]
+            for line in f:
+                fields = line.strip().split(",")
+                if fields == [""]:
+                    continue
+                yield tuple(int(fields[i]) for i in columns)
 
     def validate_all(self) -> Iterator[ComparisonResult]:
         """
@@ -86,7 +178,7 @@ class CrossValidator:
 
         The validator:
         1. Starts with empty order books
-        2. For each state_*.json file (in sequence order):
+        2. For each C++ state export (in sequence order):
            a. Applies all deltas up to the state's timestamp
            b. Compares Python state with C++ export
            c. Yields comparison result
@@ -106,75 +198,62 @@ class CrossValidator:
 
         # Collect all deltas sorted by (timestamp, sequence_num)
         all_deltas = list(self._read_deltas())
-        all_deltas.sort(key=lambda d: (int(d["timestamp"]), int(d["sequence_num"])))
+        all_deltas.sort(key=itemgetter(0, 1))
 
         # Collect all trades sorted by timestamp
         all_trades = list(self._read_trades())
-        all_trades.sort(key=lambda t: int(t["timestamp"]))
+        all_trades.sort(key=itemgetter(0))
 
-        # Find all state files
-        state_files = sorted(self.states_dir.glob("state_*.json"))
-        if not state_files:
-            yield ComparisonResult(
-                match=False,
-                sequence_num=-1,
-                timestamp=-1,
-                differences=["No state files found in states directory"],
-            )
-            return
+        # Sorted timestamp keys, so each state's cut point is one bisect
+        delta_timestamps = [row[0] for row in all_deltas]
+        trade_timestamps = [row[0] for row in all_trades]
 
         # Track which deltas and trades have been applied
         delta_idx = 0
         trade_idx = 0
+        compared = False
 
-        for state_file in state_files:
-            # Extract sequence number from filename
-            seq_num = int(state_file.stem.split("_")[1])
-
-            # Load C++ state
-            cpp_state = self._load_cpp_state(seq_num)
+        for seq_num, cpp_state in self._iter_cpp_states():
+            compared = True
             if cpp_state is None:
+                missing = self.states_dir / f"state_{seq_num:06d}.json"
                 yield ComparisonResult(
                     match=False,
                     sequence_num=seq_num,
                     timestamp=-1,
-                    differences=[f"Missing state file: {state_file}"],
+                    differences=[f"Missing state file: {missing}"],
                 )
                 continue
 
             cpp_timestamp = cpp_state.get("timestamp", -1)
 
             # Apply all deltas with timestamp <= cpp_timestamp
-            while delta_idx < len(all_deltas):
-                delta = all_deltas[delta_idx]
-                if int(delta["timestamp"]) <= cpp_timestamp:
-                    inst_id = int(delta.get("instrument_id", 1))
-                    if inst_id in books:
-                        books[inst_id].apply_delta(delta)
-                    delta_idx += 1
-                else:
-                    break
-
-            # Apply all trades with timestamp <= cpp_timestamp
-            while trade_idx < len(all_trades):
-                trade = all_trades[trade_idx]
-                if int(trade["timestamp"]) <= cpp_timestamp:
-                    pnl_tracker.on_trade(
-                        buyer_id=int(trade["buyer_id"]),
-                        seller_id=int(trade["seller_id"]),
-                        price=int(trade["price"]),
-                        quantity=int(trade["quantity"]),
-                    )
-                    trade_idx += 1
-                else:
-                    break
+            delta_end = bisect.bisect_right(delta_timestamps, cpp_timestamp, lo=delta_idx)
+            for _, _, inst_id, delta in all_deltas[delta_idx:delta_end]:
+                book = books.get(inst_id)
+                if book is not None:
+                    book.apply_delta(delta)
+            delta_idx = delta_end
+
+            # Apply all trades with timestamp <= cpp_timestamp as one batch
+            trade_end = bisect.bisect_right(trade_timestamps, cpp_timestamp, lo=trade_idx)
+            pnl_tracker.apply_trades(trade[1:] for trade in all_trades[trade_idx:trade_end])
+            trade_idx = trade_end
 
             # Compare states
-            result = self.comparator.compare_full_state(
-                cpp_state, books, pnl_tracker.get_state()
-            )
+            # Pass the tracker's PnLState objects directly; building the
+            # to_dict() snapshot for every state file is wasted work.
+            result = self.comparator.compare_full_state(cpp_state, books, pnl_tracker.pnl)
             yield result
 
+        if not compared:
+            yield ComparisonResult(
+                match=False,
+                sequence_num=-1,
+                timestamp=-1,
+                differences=["No state files found in states directory"],
+            )
+
     def validate_final_state(self) -> ComparisonResult:
         """
         Validate only the final state (after all deltas applied).
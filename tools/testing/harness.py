@@ -11,6 +11,7 @@ Usage:
     python -m tools.testing.harness
     python -m tools.testing.harness --build-dir build/debug
     python -m tools.testing.harness --verbose --keep-output
+    python -m tools.testing.harness --jobs 4
 """
 
 from __future__ import annotations
@@ -21,6 +22,8 @@ import shutil
 import subprocess
 import sys
 import tempfile
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field
 from enum import Enum
 from pathlib import Path
@@ -29,6 +32,21 @@ from typing import Iterator
 from tools.testing.cross_validator import CrossValidator
 
 
+def _has_state_exports(test_dir: str) -> bool:
+    """True if test_dir holds states.jsonl or at least one states/state_*.json."""
+    if os.path.isfile(os.path.join(test_dir, "states.jsonl")):
+        return True
+    try:
+        with os.scandir(os.path.join(test_dir, "states")) as entries:
+            # any() stops at the first state file instead of listing them all
+            return any(
+                entry.name.startswith("state_") and entry.name.endswith(".json")
+                for entry in entries
+            )
+    except (FileNotFoundError, NotADirectoryError):
+        return False
+
+
 class ValidationStatus(Enum):
     """Status of a cross-validation test."""
 
@@ -38,7 +56,7 @@ class ValidationStatus(Enum):
     ERROR = "error"
 
 
-@dataclass
+@dataclass(slots=True)
 class ValidationResult:
     """Result of a single cross-validation test."""
 
@@ -71,7 +89,7 @@ class ValidationResult:
         return result
 
 
-@dataclass
+@dataclass(slots=True)
 class HarnessResult:
     """Aggregate result of all cross-validation tests."""
 
@@ -79,31 +97,43 @@ class HarnessResult:
     cpp_binary: str = ""
     output_dir: str = ""
 
+    def status_counts(self) -> Counter[ValidationStatus]:
+        """Number of tests per status, counted in a single pass."""
+        return Counter(t.status for t in self.tests)
+
+    def _count(self, status: ValidationStatus) -> int:
+        return sum(1 for t in self.tests if t.status is status)
+
     @property
     def total(self) -> int:
         return len(self.tests)
 
     @property
     def passed(self) -> int:
-        return sum(1 for t in self.tests if t.status == ValidationStatus.PASSED)
+        return self._count(ValidationStatus.PASSED)
 
     @property
     def failed(self) -> int:
-        return sum(1 for t in self.tests if t.status == ValidationStatus.FAILED)
+        return self._count(ValidationStatus.FAILED)
 
     @property
     def errors(self) -> int:
-        return sum(1 for t in self.tests if t.status == ValidationStatus.ERROR)
+        return self._count(ValidationStatus.ERROR)
 
     @property
     def skipped(self) -> int:
-        return sum(1 for t in self.tests if t.status == ValidationStatus.SKIPPED)
+        return self._count(ValidationStatus.SKIPPED)
 
     @property
     def success(self) -> bool:
-        return self.failed == 0 and self.errors == 0
+        # One pass that stops at the first failure or error
+        return all(
+            t.status is not ValidationStatus.FAILED and t.status is not ValidationStatus.ERROR
+            for t in self.tests
+        )
 
     def summary(self) -> str:
+        counts = self.status_counts()
         lines = [
             "",
             "=" * 60,
@@ -111,10 +141,10 @@ class HarnessResult:
             "=" * 60,
             f"Binary: {self.cpp_binary}",
             f"Total tests: {self.total}",
-            f"  Passed: {self.passed}",
-            f"  Failed: {self.failed}",
-            f"  Errors: {self.errors}",
-            f"  Skipped: {self.skipped}",
+            f"  Passed: {counts[ValidationStatus.PASSED]}",
+            f"  Failed: {counts[ValidationStatus.FAILED]}",
+            f"  Errors: {counts[ValidationStatus.ERROR]}",
+            f"  Skipped: {counts[ValidationStatus.SKIPPED]}",
             "",
         ]
 
@@ -126,6 +156,79 @@ class HarnessResult:
         return "\n".join(lines)
 
 
+def _validate_one(test_dir: Path) -> ValidationResult:
+    """
+    Validate a single test's output using Python cross-validator.
+
+    Module-level so ProcessPoolExecutor can pickle it for worker processes.
+
+    Args:
+        test_dir: Directory containing deltas.csv, trades.csv, and states/.
+
+    Returns:
+        ValidationResult with validation outcome.
+    """
+    test_name = test_dir.name
+
+    # Check required files exist
+    deltas_file = test_dir / "deltas.csv"
+    states_dir = test_dir / "states"
+
+    if not deltas_file.exists():
+        return ValidationResult(
+            name=test_name,
+            status=ValidationStatus.ERROR,
+            error_message="Missing deltas.csv",
+        )
+
+    if not states_dir.exists() and not (test_dir / "states.jsonl").exists():
+        return ValidationResult(
+            name=test_name,
+            status=ValidationStatus.ERROR,
+            error_message="Missing states/ directory",
+        )
+
+    # Run cross-validation
+    try:
+        validator = CrossValidator(output_dir=test_dir)
+        results = list(validator.validate_all())
+
+        if not results:
+            return ValidationResult(
+                name=test_name,
+                status=ValidationStatus.ERROR,
+                error_message="No state files to validate",
+            )
+
+        # Count passes and failures
+        failures = [r for r in results if not r.match]
+        all_diffs = []
+        for r in failures:
+            all_diffs.extend(r.differences[:5])  # First 5 diffs per failure
+
+        if failures:
+            return ValidationResult(
+                name=test_name,
+                status=ValidationStatus.FAILED,
+                state_comparisons=len(results),
+                state_failures=len(failures),
+                differences=all_diffs[:20],  # Cap total diffs
+            )
+
+        return ValidationResult(
+            name=test_name,
+            status=ValidationStatus.PASSED,
+            state_comparisons=len(results),
+        )
+
+    except Exception as e:
+        return ValidationResult(
+            name=test_name,
+            status=ValidationStatus.ERROR,
+            error_message=str(e),
+        )
+
+
 class CrossValidationHarness:
     """
     Orchestrates cross-validation between C++ and Python implementations.
@@ -153,6 +256,7 @@ class CrossValidationHarness:
         build_dir: Path | None = None,
         keep_output: bool = False,
         verbose: bool = False,
+        jobs: int = 1,
     ):
         """
         Initialize the harness.
@@ -162,10 +266,13 @@ class CrossValidationHarness:
                        If None, searches standard locations.
             keep_output: If True, preserve test output directories.
             verbose: If True, print detailed progress information.
+            jobs: Worker processes for Python validation. 1 (the default)
+                  validates serially in this process.
         """
         self.build_dir = build_dir
         self.keep_output = keep_output
         self.verbose = verbose
+        self.jobs = jobs
         self._output_dir: Path | None = None
 
     def find_binary(self) -> Path | None:
@@ -248,85 +355,43 @@ class CrossValidationHarness:
         Yields:
             Paths to individual test output directories.
         """
-        if not output_dir.exists():
+        # One directory listing; DirEntry caches the entry type, so filtering
+        # on is_dir() costs no extra stat per child.
+        try:
+            with os.scandir(output_dir) as entries:
+                test_dirs = sorted(
+                    entry.path
+                    for entry in entries
+                    if entry.name.startswith("test_") and entry.is_dir()
+                )
+        except (FileNotFoundError, NotADirectoryError):
             return
 
-        for entry in sorted(output_dir.iterdir()):
-            if entry.is_dir() and entry.name.startswith("test_"):
-                # Must have a states subdirectory to be valid
-                states_dir = entry / "states"
-                if states_dir.exists() and any(states_dir.glob("state_*.json")):
-                    yield entry
+        for test_dir in test_dirs:
+            # Must have state exports (states.jsonl or states/) to be valid
+            if _has_state_exports(test_dir):
+                yield Path(test_dir)
 
-    def _validate_test_output(self, test_dir: Path) -> ValidationResult:
+    def _validate_test_outputs(self, test_dirs: list[Path]) -> Iterator[ValidationResult]:
         """
-        Validate a single test's output using Python cross-validator.
-
-        Args:
-            test_dir: Directory containing deltas.csv, trades.csv, and states/.
+        Validate test outputs, in parallel when more than one worker is allowed.
 
-        Returns:
-            ValidationResult with validation outcome.
+        Each test directory is independent and validation is GIL-bound, so
+        directories are spread over worker processes. Results are yielded in
+        the order of test_dirs regardless of which worker finishes first.
         """
-        test_name = test_dir.name
-
-        # Check required files exist
-        deltas_file = test_dir / "deltas.csv"
-        states_dir = test_dir / "states"
-
-        if not deltas_file.exists():
-            return ValidationResult(
-                name=test_name,
-                status=ValidationStatus.ERROR,
-                error_message="Missing deltas.csv",
-            )
-
-        if not states_dir.exists():
-            return ValidationResult(
-                name=test_name,
-                status=ValidationStatus.ERROR,
-                error_message="Missing states/ directory",
-            )
-
-        # Run cross-validation
-        try:
-            validator = CrossValidator(output_dir=test_dir)
-            results = list(validator.validate_all())
-
-            if not results:
-                return ValidationResult(
-                    name=test_name,
-                    status=ValidationStatus.ERROR,
-                    error_message="No state files to validate",
-                )
-
-            # Count passes and failures
-            failures = [r for r in results if not r.match]
-            all_diffs = []
-            for r in failures:
-                all_diffs.extend(r.differences[:5])  # First 5 diffs per failure
-
-            if failures:
-                return ValidationResult(
-                    name=test_name,
-                    status=ValidationStatus.FAILED,
-                    state_comparisons=len(results),
-                    state_failures=len(failures),
-                    differences=all_diffs[:20],  # Cap total diffs
-                )
-
-            return ValidationResult(
-                name=test_name,
-                status=ValidationStatus.PASSED,
-                state_comparisons=len(results),
-            )
+        workers = min(self.jobs, len(test_dirs))
+        if workers <= 1:
+            for test_dir in test_dirs:
+                if self.verbose:
+                    print(f"\nValidating {test_dir.name}...")
+                yield _validate_one(test_dir)
+            return
 
-        except Exception as e:
-            return ValidationResult(
-                name=test_name,
-                status=ValidationStatus.ERROR,
-                error_message=str(e),
-            )
+        if self.verbose:
+            print(f"\nValidating {len(test_dirs)} tests with {workers} worker processes...")
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            yield from executor.map(_validate_one, test_dirs)
 
     def run(self) -> HarnessResult:
         """
@@ -399,12 +464,8 @@ class CrossValidationHarness:
                 )
                 return result
 
-            # Validate each test
-            for test_dir in test_dirs:
-                if self.verbose:
-                    print(f"\nValidating {test_dir.name}...")
-
-                test_result = self._validate_test_output(test_dir)
+            # Validate each test; reported in discovery order as results arrive
+            for test_result in self._validate_test_outputs(test_dirs):
                 result.tests.append(test_result)
                 print(test_result)
 
@@ -445,6 +506,13 @@ def main() -> int:
         action="store_true",
         help="Print detailed progress information",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Worker processes for Python validation (default: 1)",
+    )
 
     args = parser.parse_args()
 
@@ -452,6 +520,7 @@ def main() -> int:
         build_dir=args.build_dir,
         keep_output=args.keep_output,
         verbose=args.verbose,
+        jobs=args.jobs,
     )
 
     result = harness.run()
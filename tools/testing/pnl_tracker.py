@@ -5,13 +5,18 @@ Mirrors the C++ P&L tracking logic to validate that Python and C++
 produce identical position and cash states.
 """
 
-from dataclasses import dataclass, field
-from typing import Optional
+from collections import defaultdict
+from dataclasses import dataclass
+from itertools import takewhile
+from typing import Iterable, Iterator, Optional
 import csv
 from pathlib import Path
 
+# trades.csv read buffer; larger than the default to cut read syscalls
+_READ_BUFFER = 1 << 20
 
-@dataclass
+
+@dataclass(slots=True)
 class PnLState:
     """P&L state for a single participant."""
 
@@ -47,13 +52,9 @@ class PnLTracker:
     """
 
     def __init__(self):
-        self.pnl: dict[int, PnLState] = {}
-
-    def _ensure_client(self, client_id: int) -> PnLState:
-        """Ensure client exists in tracker and return their PnL state."""
-        if client_id not in self.pnl:
-            self.pnl[client_id] = PnLState()
-        return self.pnl[client_id]
+        # Missing clients get a fresh PnLState on first trade. Read paths use
+        # membership checks, so lookups never insert phantom clients.
+        self.pnl: defaultdict[int, PnLState] = defaultdict(PnLState)
 
     def on_trade(
         self, buyer_id: int, seller_id: int, price: int, quantity: int
@@ -74,15 +75,34 @@ class PnLTracker:
         trade_value = quantity * price
 
         # Update buyer
-        buyer_pnl = self._ensure_client(buyer_id)
+        buyer_pnl = self.pnl[buyer_id]
         buyer_pnl.long_position += quantity
         buyer_pnl.cash -= trade_value
 
         # Update seller
-        seller_pnl = self._ensure_client(seller_id)
+        seller_pnl = self.pnl[seller_id]
         seller_pnl.short_position += quantity
         seller_pnl.cash += trade_value
 
+    def apply_trades(self, trades: Iterable[tuple[int, int, int, int]]) -> None:
+        """
+        Update P&L for a batch of (buyer_id, seller_id, price, quantity) trades.
+
+        Equivalent to calling on_trade for each trade in order, without the
+        per-trade method call.
+        """
+        pnl = self.pnl
+        for buyer_id, seller_id, price, quantity in trades:
+            trade_value = quantity * price
+
+            buyer_pnl = pnl[buyer_id]
+            buyer_pnl.long_position += quantity
+            buyer_pnl.cash -= trade_value
+
+            seller_pnl = pnl[seller_id]
+            seller_pnl.short_position += quantity
+            seller_pnl.cash += trade_value
+
     def get_state(self) -> dict[int, dict]:
         """
         Get current P&L state for all participants.
@@ -113,6 +133,26 @@ class PnLTracker:
         """Clear all P&L state."""
         self.pnl.clear()
 
+    @staticmethod
+    def _iter_trade_rows(f) -> Iterator[tuple[int, ...]]:
+        """
+        Yield (timestamp, buyer_id, seller_id, price, quantity) from an open trades.csv.
+
+        Uses csv.reader with column positions taken from the header, so no
+        dict is built per row.
+        """
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        columns = [
+            header.index(name)
+            for name in ("timestamp", "buyer_id", "seller_id", "price", "quantity")
+        ]
+        for row in reader:
+            if row:
+                yield tuple(int(row[i]) for i in columns)
+
     @classmethod
     def from_trades_csv(cls, trades_file: Path) -> "PnLTracker":
         """
@@ -126,15 +166,8 @@ class PnLTracker:
         """
         tracker = cls()
 
-        with open(trades_file, "r", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                tracker.on_trade(
-                    buyer_id=int(row["buyer_id"]),
-                    seller_id=int(row["seller_id"]),
-                    price=int(row["price"]),
-                    quantity=int(row["quantity"]),
-                )
+        with open(trades_file, "r", newline="", encoding="utf-8", buffering=_READ_BUFFER) as f:
+            tracker.apply_trades(trade[1:] for trade in cls._iter_trade_rows(f))
 
         return tracker
 
@@ -151,18 +184,12 @@ class PnLTracker:
         Returns:
             Self (for chaining)
         """
-        with open(trades_file, "r", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                ts = int(row["timestamp"])
-                if ts > max_timestamp:
-                    break
-
-                self.on_trade(
-                    buyer_id=int(row["buyer_id"]),
-                    seller_id=int(row["seller_id"]),
-                    price=int(row["price"]),
-                    quantity=int(row["quantity"]),
+        with open(trades_file, "r", newline="", encoding="utf-8", buffering=_READ_BUFFER) as f:
+            self.apply_trades(
+                trade[1:]
+                for trade in takewhile(
+                    lambda trade: trade[0] <= max_timestamp, self._iter_trade_rows(f)
                 )
+            )
 
         return self
@@ -6,9 +6,24 @@ that both engines produce identical results.
 """
 
 from dataclasses import dataclass, field
+from operator import attrgetter
 
+from tools.testing.pnl_tracker import PnLState
 from tools.visualizer.order_book import OrderBook, Order, Side
 
+_PNL_FIELDS = ("long_position", "short_position", "cash")
+
+# Compared order fields: C++ JSON key -> Python Order attribute (attrgetter path)
+_ORDER_FIELDS = (
+    ("order_id", "order_id"),
+    ("client_id", "client_id"),
+    ("quantity", "quantity"),
+    ("price", "price"),
+    ("side", "side.value"),
+)
+_CPP_ORDER_KEYS = tuple(key for key, _ in _ORDER_FIELDS)
+_py_order_values = attrgetter(*(attr for _, attr in _ORDER_FIELDS))
+
 
 @dataclass
 class ComparisonResult:
@@ -127,6 +142,9 @@ class StateComparator:
                 continue
 
             for j, (cpp_order, py_order) in enumerate(zip(cpp_orders, py_orders)):
+                # Fast path: matching orders need no diff strings
+                if tuple(map(cpp_order.get, _CPP_ORDER_KEYS)) == _py_order_values(py_order):
+                    continue
                 order_diffs = self._compare_orders(
                     cpp_order,
                     py_order,
@@ -146,34 +164,22 @@ class StateComparator:
         self, cpp_order: dict, py_order: Order, context: str
     ) -> list[str]:
         """Compare individual order fields."""
-        diffs = []
-
-        # Map C++ JSON field names to Python Order attribute names
-        fields = [
-            ("order_id", cpp_order.get("order_id"), py_order.order_id),
-            ("client_id", cpp_order.get("client_id"), py_order.client_id),
-            ("quantity", cpp_order.get("quantity"), py_order.quantity),
-            ("price", cpp_order.get("price"), py_order.price),
+        return [
+            f"{context}.{field_name}: C++={cpp_val}, Py={py_val}"
+            for field_name, cpp_val, py_val in zip(
+                _CPP_ORDER_KEYS, map(cpp_order.get, _CPP_ORDER_KEYS), _py_order_values(py_order)
+            )
+            if cpp_val != py_val
         ]
 
-        for field_name, cpp_val, py_val in fields:
-            if cpp_val != py_val:
-                diffs.append(f"{context}.{field_name}: C++={cpp_val}, Py={py_val}")
-
-        cpp_side = cpp_order.get("side")
-        py_side = py_order.side.value
-        if cpp_side != py_side:
-            diffs.append(f"{context}.side: C++={cpp_side}, Py={py_side}")
-
-        return diffs
-
     def compare_pnl(self, cpp_pnl: dict, py_pnl: dict) -> list[str]:
         """
         Compare P&L state between C++ export and Python tracker.
 
         Args:
             cpp_pnl: Dict from C++ state, maps str(client_id) -> PnL dict
-            py_pnl: Dict from Python tracker, maps int(client_id) -> PnL dict
+            py_pnl: Dict from Python tracker, maps int(client_id) -> PnLState
+                (e.g. PnLTracker.pnl) or PnL dict (PnLTracker.get_state())
 
         Returns:
             List of differences (empty if P&L matches)
@@ -196,10 +202,17 @@ class StateComparator:
             cpp_client_pnl = cpp_pnl[str(client_id)]
             py_client_pnl = py_pnl[client_id]
 
-            fields = ["long_position", "short_position", "cash"]
-            for field in fields:
+            if isinstance(py_client_pnl, PnLState):
+                py_values = (
+                    py_client_pnl.long_position,
+                    py_client_pnl.short_position,
+                    py_client_pnl.cash,
+                )
+            else:
+                py_values = tuple(py_client_pnl.get(field, 0) for field in _PNL_FIELDS)
+
+            for field, py_val in zip(_PNL_FIELDS, py_values):
                 cpp_val = cpp_client_pnl.get(field, 0)
-                py_val = py_client_pnl.get(field, 0)
 
                 if abs(cpp_val - py_val) > self.tolerance:
                     differences.append(
@@ -220,7 +233,7 @@ class StateComparator:
         Args:
             cpp_state: Full JSON state dict from C++ export
             py_books: Dict mapping instrument_id (int) -> Python OrderBook
-            py_pnl: Dict mapping client_id (int) -> PnL dict
+            py_pnl: Dict mapping client_id (int) -> PnLState or PnL dict
 
         Returns:
             ComparisonResult with match status and any differences
@@ -22,8 +22,8 @@ Architecture:
        but stores only O(unique timestamps) data, not the deltas themselves.
 
     2. On-demand reading: When navigating to a timestamp, deltas are read
-       directly from the file by seeking to the stored byte offset, avoiding
-       full file scans for sequential navigation.
+       from the memory-mapped file at the stored byte offset, avoiding full
+       file scans for sequential navigation.
 
     3. Reverse deltas: Stepping backward applies inverse operations to undo
        deltas, enabling O(d) backward steps instead of O(N) rebuilds. This
@@ -33,9 +33,13 @@ Architecture:
        allowing correct timestamp restoration when reversing FILL, CANCEL,
        and MODIFY operations.
 
+    5. Snapshots: Books rebuilt for a jump are copied every SNAPSHOT_STRIDE
+       timestamps (LRU-bounded), so later jumps replay only from the
+       nearest earlier snapshot instead of from the start of the file.
+
 Complexity:
     - Build index:              O(N) single pass
-    - Jump to timestamp:        O(N) rebuild from start
+    - Jump to timestamp:        O(N) rebuild from the nearest cached snapshot
     - Step forward:             O(d) apply deltas at next timestamp
     - Step backward:            O(d) reverse deltas at current timestamp
     - Sequential forward scan:  O(N)
@@ -45,9 +49,14 @@ Complexity:
 """
 
 import argparse
-import csv
+import bisect
+import mmap
+import os
+from abc import ABC, abstractmethod
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Optional
+from itertools import takewhile
+from typing import Iterator, Optional
 
 
 import matplotlib.pyplot as plt
@@ -56,7 +65,7 @@ import matplotlib.ticker as mticker
 import seaborn as sns
 
 
-from tools.visualizer.order_book import Side, OrderBook
+from tools.visualizer.order_book import Delta, Side, OrderBook
 from tools.db import reader as db_reader
 
 
@@ -112,19 +121,132 @@ def _build_frame(book: OrderBook, ts: int, tower_levels: int) -> _FrameData:
 
 
 def read_deltas(path: str):
-    """Yield delta dicts from a CSV file using the standard csv.DictReader."""
+    """
+    Yield delta dicts from a deltas.csv file.
+
+    The simulator writes unquoted integer/enum fields, so each line is split
+    on commas directly (as DeltaIndex does) rather than going through the
+    per-character csv.DictReader state machine.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        fieldnames = f.readline().strip().split(",")
+        for line in f:
+            line = line.strip()
+            if line:
+                yield dict(zip(fieldnames, line.split(",")))
+
+
+def read_delta_records(path: str):
+    """
+    Yield typed Delta records from a deltas.csv file.
+
+    Like read_deltas, but each line is converted by column position
+    (Delta.parser) instead of being zipped into a string dict first.
+    """
     with open(path, "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            yield row
+        parse = Delta.parser(f.readline().strip().split(","))
+        for line in f:
+            line = line.strip()
+            if line:
+                yield parse(line.split(","))
+
+
+def _closest_timestamp_index(timestamps: list[int], target_ts: int) -> int:
+    """
+    Binary-search sorted unique timestamps for target_ts.
+
+    Returns the exact index if present, otherwise the index of the nearest
+    timestamp (the earlier one on a tie).
+    """
+    if not timestamps:
+        raise ValueError("no timestamps to search")
+    i = bisect.bisect_left(timestamps, target_ts)
+    if i == len(timestamps):
+        return i - 1
+    if i == 0 or timestamps[i] == target_ts:
+        return i
+    return i - 1 if target_ts - timestamps[i - 1] <= timestamps[i] - target_ts else i
+
+
+# Replayed books are snapshotted every SNAPSHOT_STRIDE timestamp indices so a
+# jump only replays from the nearest earlier snapshot; at most MAX_SNAPSHOTS
+# are kept, least recently used evicted first.
+SNAPSHOT_STRIDE = 256
+MAX_SNAPSHOTS = 32
+
+
+class _SnapshotReplay(ABC):
+    """
+    Base class that reconstructs books at a timestamp index from cached snapshots.
+
+    Subclasses set ``timestamps`` and an ``_snapshots`` OrderedDict, and
+    implement ``_iter_deltas_from``.
+    """
+
+    timestamps: list[int]
+    _snapshots: "OrderedDict[int, OrderBook]"
+
+    @abstractmethod
+    def _iter_deltas_from(self, idx: int) -> Iterator[Delta]:
+        """Yield Delta records starting at the first delta of timestamp index idx."""
 
+    def book_at_index(self, idx: int) -> OrderBook:
+        """
+        Return the order book after applying all deltas up to index idx.
 
-class DeltaIndex:
+        Starts from the closest cached snapshot at or before idx (or an
+        empty book) and replays only the remaining deltas. The returned
+        book is a private copy that the caller may mutate.
+        """
+        if idx < 0 or idx >= len(self.timestamps):
+            return OrderBook()
+
+        snapshots = self._snapshots
+        key = idx - idx % SNAPSHOT_STRIDE
+        while key >= 0 and key not in snapshots:
+            key -= SNAPSHOT_STRIDE
+        if key >= 0:
+            snapshots.move_to_end(key)
+            if key == idx:
+                return snapshots[key].copy()
+            book = snapshots[key].copy()
+            cur = key + 1
+        else:
+            book = OrderBook()
+            cur = 0
+
+        timestamps = self.timestamps
+        end_ts = timestamps[idx]
+        for delta in self._iter_deltas_from(cur):
+            if delta.timestamp > end_ts:
+                break
+            if delta.timestamp != timestamps[cur]:
+                self._remember_snapshot(snapshots, cur, book)
+                cur += 1
+            book.apply_delta(delta)
+        self._remember_snapshot(snapshots, idx, book)
+        return book
+
+    @staticmethod
+    def _remember_snapshot(
+        snapshots: "OrderedDict[int, OrderBook]", idx: int, book: OrderBook
+    ) -> None:
+        if idx % SNAPSHOT_STRIDE or idx in snapshots:
+            return
+        snapshots[idx] = book.copy()
+        if len(snapshots) > MAX_SNAPSHOTS:
+            snapshots.popitem(last=False)
+
+
+class DeltaIndex(_SnapshotReplay):
     """
     Lightweight index for streaming navigation through a deltas file.
 
     Builds an index mapping timestamp indices to byte offsets in the file,
     allowing on-demand reading without loading everything into memory.
+
+    The file stays memory-mapped until close(); use the index as a context
+    manager to release it deterministically.
     """
 
     def __init__(self, path: str):
@@ -133,6 +255,8 @@ class DeltaIndex:
         self._offsets: list[int] = []
         self._header_end: int = 0
         self._fieldnames: list[str] = []
+        self._snapshots: OrderedDict[int, OrderBook] = OrderedDict()
+        self._data: mmap.mmap | bytes = b""
         self._build_index()
 
     def _build_index(self) -> None:
@@ -140,55 +264,77 @@ class DeltaIndex:
         Build the timestamp-to-offset index with a single pass through the file.
 
         Stores byte offsets for the first line of each unique timestamp,
-        enabling efficient seeking for on-demand delta reading.
+        enabling efficient seeking for on-demand delta reading. The file is
+        scanned in binary mode with offsets accumulated from line lengths,
+        avoiding a text-mode tell() per line, and the timestamp field is only
+        converted to int when its bytes differ from the previous line's.
+
+        The file is also memory-mapped once; every read is served from the
+        mapping by byte offset rather than by reopening and seeking the file.
         """
-        with open(self.path, "r", encoding="utf-8") as f:
+        with open(self.path, "rb") as f:
+            if os.fstat(f.fileno()).st_size:
+                self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
             header_line = f.readline()
-            self._header_end = f.tell()
-            self._fieldnames = header_line.strip().split(",")
-
-            current_ts: Optional[int] = None
-            while True:
-                offset = f.tell()
-                line = f.readline()
-                if not line:
-                    break
-
-                ts = int(line.split(",", 1)[0])
-                if ts != current_ts:
-                    self.timestamps.append(ts)
-                    self._offsets.append(offset)
-                    current_ts = ts
+            offset = self._header_end = len(header_line)
+            self._fieldnames = header_line.decode("utf-8").strip().split(",")
+
+            current_field: Optional[bytes] = None
+            for line in f:
+                ts_field = line.split(b",", 1)[0]
+                if ts_field != current_field:
+                    ts = int(ts_field)
+                    if not self.timestamps or ts != self.timestamps[-1]:
+                        self.timestamps.append(ts)
+                        self._offsets.append(offset)
+                    current_field = ts_field
+                offset += len(line)
+
+    def close(self) -> None:
+        """Release the memory-mapped file. Reads after close() raise ValueError."""
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+
+    def __enter__(self) -> "DeltaIndex":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
 
     def __len__(self) -> int:
         return len(self.timestamps)
 
+    def _end_offset(self, idx: int) -> int:
+        """Byte offset just past the last delta of timestamp index idx."""
+        return self._offsets[idx + 1] if idx + 1 < len(self._offsets) else len(self._data)
+
+    def _iter_lines(self, start: int, end: int) -> Iterator[str]:
+        """Yield the non-blank lines of the mapped file between byte offsets start and end."""
+        data = self._data
+        while start < end:
+            newline = data.find(b"\n", start, end)
+            if newline < 0:
+                newline = end
+            line = data[start:newline].strip()
+            start = newline + 1
+            if line:
+                yield line.decode("utf-8")
+
     def read_deltas_at_index(self, idx: int) -> list[dict]:
         """
         Read all deltas for the timestamp at the given index.
 
-        Seeks directly to the stored byte offset and reads until the timestamp
-        changes, avoiding a full file scan.
+        Reads the memory-mapped file between this timestamp's byte offset and
+        the next one's, avoiding a file open or full scan per call.
         """
         if idx < 0 or idx >= len(self.timestamps):
             return []
 
-        target_ts = self.timestamps[idx]
-        start_offset = self._offsets[idx]
-
-        results = []
-        with open(self.path, "r", encoding="utf-8") as f:
-            f.seek(start_offset)
-            while True:
-                line = f.readline()
-                if not line:
-                    break
-                parts = line.strip().split(",")
-                ts = int(parts[0])
-                if ts != target_ts:
-                    break
-                results.append(dict(zip(self._fieldnames, parts)))
-        return results
+        fieldnames = self._fieldnames
+        return [
+            dict(zip(fieldnames, line.split(",")))
+            for line in self._iter_lines(self._offsets[idx], self._end_offset(idx))
+        ]
 
     def read_deltas_up_to_index(self, idx: int):
         """
@@ -200,18 +346,14 @@ class DeltaIndex:
         if idx < 0 or idx >= len(self.timestamps):
             return
 
-        end_ts = self.timestamps[idx]
-        with open(self.path, "r", encoding="utf-8") as f:
-            f.seek(self._header_end)
-            while True:
-                line = f.readline()
-                if not line:
-                    break
-                parts = line.strip().split(",")
-                ts = int(parts[0])
-                if ts > end_ts:
-                    break
-                yield dict(zip(self._fieldnames, parts))
+        fieldnames = self._fieldnames
+        for line in self._iter_lines(self._header_end, self._end_offset(idx)):
+            yield dict(zip(fieldnames, line.split(",")))
+
+    def _iter_deltas_from(self, idx: int) -> Iterator[Delta]:
+        parse = Delta.parser(self._fieldnames)
+        for line in self._iter_lines(self._offsets[idx], len(self._data)):
+            yield parse(line.split(","))
 
     def find_timestamp_index(self, target_ts: int) -> int:
         """
@@ -220,13 +362,10 @@ class DeltaIndex:
         Returns the exact index if the timestamp exists, otherwise returns
         the index of the timestamp with minimum absolute difference.
         """
-        if target_ts in self.timestamps:
-            return self.timestamps.index(target_ts)
-        closest = min(self.timestamps, key=lambda t: abs(t - target_ts))
-        return self.timestamps.index(closest)
+        return _closest_timestamp_index(self.timestamps, target_ts)
 
 
-class DBDeltaIndex:
+class DBDeltaIndex(_SnapshotReplay):
     """
     In-memory delta index backed by a PostgreSQL run.
 
@@ -241,6 +380,7 @@ class DBDeltaIndex:
 
         self.timestamps: list[int] = []
         self._groups: list[list[dict]] = []
+        self._snapshots: OrderedDict[int, OrderBook] = OrderedDict()
 
         for delta in all_deltas:
             ts = int(delta["timestamp"])
@@ -263,20 +403,23 @@ class DBDeltaIndex:
         for i in range(idx + 1):
             yield from self._groups[i]
 
+    def _iter_deltas_from(self, idx: int) -> Iterator[Delta]:
+        for group in self._groups[idx:]:
+            yield from map(Delta.from_row, group)
+
     def find_timestamp_index(self, target_ts: int) -> int:
-        if target_ts in self.timestamps:
-            return self.timestamps.index(target_ts)
-        closest = min(self.timestamps, key=lambda t: abs(t - target_ts))
-        return self.timestamps.index(closest)
+        return _closest_timestamp_index(self.timestamps, target_ts)
 
 
 def reconstruct_at(deltas_path: str, target_timestamp: int) -> OrderBook:
     """Reconstruct the order book state at a specific timestamp by replaying deltas."""
     book = OrderBook()
-    for delta in read_deltas(deltas_path):
-        if int(delta["timestamp"]) > target_timestamp:
-            break
-        book.apply_delta(delta)
+    book.apply_deltas(
+        takewhile(
+            lambda delta: delta.timestamp <= target_timestamp,
+            read_delta_records(deltas_path),
+        )
+    )
     return book
 
 
@@ -285,18 +428,14 @@ def reconstruct_at_from_index(
     target_timestamp: int,
 ) -> OrderBook:
     """Reconstruct the order book up to target_timestamp using a pre-built index."""
-    ts_idx = index.find_timestamp_index(target_timestamp)
-    book = OrderBook()
-    for delta in index.read_deltas_up_to_index(ts_idx):
-        book.apply_delta(delta)
-    return book
+    return index.book_at_index(index.find_timestamp_index(target_timestamp))
 
 
 def get_all_timestamps(deltas_path: str) -> list[int]:
     """Return a sorted list of all unique timestamps in the deltas file."""
-    timestamps = set()
-    for delta in read_deltas(deltas_path):
-        timestamps.add(int(delta["timestamp"]))
+    with open(deltas_path, "r", encoding="utf-8") as f:
+        f.readline()
+        timestamps = {int(line.split(",", 1)[0]) for line in f if line.strip()}
     return sorted(timestamps)
 
 
@@ -326,11 +465,19 @@ def interactive_mode(
     through timestamps or jumping to specific points. Uses streaming reads and
     reverse deltas to minimize memory usage.
 
-    Pass a pre-built index (e.g. DBDeltaIndex) to skip index construction.
+    Pass a pre-built index (e.g. DBDeltaIndex) to skip index construction;
+    an index built here is closed when the session ends.
     """
     if index is None:
         print("Building index...")
-        index = DeltaIndex(deltas_path)
+        with DeltaIndex(deltas_path) as file_index:
+            _interactive_session(file_index, levels)
+    else:
+        _interactive_session(index, levels)
+
+
+def _interactive_session(index: DeltaIndex | DBDeltaIndex, levels: Optional[int]) -> None:
+    """Run the interactive command loop over an open index."""
     if len(index) == 0:
         print("No deltas found in file.")
         return
@@ -342,15 +489,16 @@ def interactive_mode(
     print_commands()
 
     def rebuild_to_index(target_idx: int) -> OrderBook:
-        """Rebuild the order book from scratch by streaming up to target index."""
-        new_book = OrderBook()
-        for delta in index.read_deltas_up_to_index(target_idx):
-            new_book.apply_delta(delta)
-        return new_book
+        """Rebuild the order book at target index from the nearest snapshot."""
+        return index.book_at_index(target_idx)
+
+    def deltas_at(target_idx: int) -> list[Delta]:
+        """Parse the deltas at target index once; they may be applied and reversed."""
+        return [Delta.from_row(row) for row in index.read_deltas_at_index(target_idx)]
 
     idx = 0
     book = rebuild_to_index(0)
-    current_deltas: list[dict] = index.read_deltas_at_index(0)
+    current_deltas: list[Delta] = deltas_at(0)
 
     while True:
         book.print_book(levels)
@@ -370,16 +518,14 @@ def interactive_mode(
         elif parts[0].lower() == "n":
             if idx < len(index) - 1:
                 idx += 1
-                current_deltas = index.read_deltas_at_index(idx)
-                for delta in current_deltas:
-                    book.apply_delta(delta)
+                current_deltas = deltas_at(idx)
+                book.apply_deltas(current_deltas)
         elif parts[0].lower() == "p":
             if idx > 0:
                 prev_ts = index.timestamps[idx - 1]
-                for delta in reversed(current_deltas):
-                    book.apply_reverse_delta(delta, prev_ts)
+                book.apply_reverse_deltas(current_deltas, prev_ts)
                 idx -= 1
-                current_deltas = index.read_deltas_at_index(idx)
+                current_deltas = deltas_at(idx)
 
         elif parts[0].lower() == "o" and len(parts) == 2:
             try:
@@ -412,7 +558,7 @@ def interactive_mode(
                     f"showing closest: {index.timestamps[new_idx]}"
                 )
             book = rebuild_to_index(new_idx)
-            current_deltas = index.read_deltas_at_index(new_idx)
+            current_deltas = deltas_at(new_idx)
             idx = new_idx
         elif parts[0].lower() == "t":
             print("\nTOP OF BOOK:")
@@ -486,6 +632,28 @@ def plot_depth(book: OrderBook, output_path: Optional[str] = None) -> None:
         plt.show()
 
 
+def _prerender_frames(
+    index: DeltaIndex | DBDeltaIndex, step: int, tower_levels: int
+) -> list[_FrameData]:
+    """Pre-render every step-th timestamp of index in a single O(N) forward pass."""
+    n_ts = len(index)
+    if n_ts == 0:
+        return []
+    print(f"Pre-rendering {n_ts} timestamps (sampling every {step})...")
+    frames: list[_FrameData] = []
+    book = OrderBook()
+    report_every = max(1, n_ts // 20)
+    for i in range(n_ts):
+        book.apply_deltas(index.read_deltas_at_index(i))
+        if i % step == 0 or i == n_ts - 1:
+            frames.append(_build_frame(book, index.timestamps[i], tower_levels))
+        if (i + 1) % report_every == 0:
+            print(f"  {100 * (i + 1) // n_ts}%", end="\r", flush=True)
+    del book  # no longer needed; only the frame snapshots remain in memory
+    print(f"Pre-rendered {len(frames)} frames.          ")
+    return frames
+
+
 def animate_book(
     deltas_path: Optional[str],
     output_path: Optional[str] = None,
@@ -515,27 +683,14 @@ def animate_book(
 
     if index is None:
         print("Building index...")
-        index = DeltaIndex(deltas_path)
-    if len(index) == 0:
+        with DeltaIndex(deltas_path) as file_index:
+            frames = _prerender_frames(file_index, step, tower_levels)
+    else:
+        frames = _prerender_frames(index, step, tower_levels)
+    if not frames:
         print("No deltas found in file.")
         return
 
-    # --- Pre-render phase: single O(N) forward pass ---
-    n_ts = len(index)
-    print(f"Pre-rendering {n_ts} timestamps (sampling every {step})...")
-    frames: list[_FrameData] = []
-    book = OrderBook()
-    report_every = max(1, n_ts // 20)
-    for i in range(n_ts):
-        for delta in index.read_deltas_at_index(i):
-            book.apply_delta(delta)
-        if i % step == 0 or i == n_ts - 1:
-            frames.append(_build_frame(book, index.timestamps[i], tower_levels))
-        if (i + 1) % report_every == 0:
-            print(f"  {100 * (i + 1) // n_ts}%", end="\r", flush=True)
-    del book  # no longer needed; only the frame snapshots remain in memory
-    print(f"Pre-rendered {len(frames)} frames.          ")
-
     # --- Render phase: pure matplotlib, zero computation per frame ---
     n_frames = len(frames)
     fig, (ax_depth, ax_tower) = plt.subplots(1, 2, figsize=(18, 7))
@@ -1,7 +1,8 @@
 from dataclasses import dataclass
 from enum import Enum
 from collections import deque
-from typing import Optional
+from itertools import islice
+from typing import Any, Callable, Iterable, Mapping, Optional, Sequence
 
 from sortedcontainers import SortedDict
 
@@ -11,7 +12,7 @@ class Side(Enum):
     SELL = "SELL"
 
 
-@dataclass
+@dataclass(slots=True)
 class Order:
     order_id: int
     client_id: int
@@ -21,35 +22,175 @@ class Order:
     timestamp: int
 
 
+@dataclass(slots=True, frozen=True)
+class Delta:
+    """A single order book delta with typed fields (one deltas.csv row)."""
+
+    timestamp: int
+    delta_type: str
+    order_id: int
+    client_id: int
+    side: Side
+    price: int
+    quantity: int
+    remaining_qty: int
+    new_order_id: int = 0
+    new_price: int = 0
+    new_quantity: int = 0
+
+    @classmethod
+    def from_row(cls, row: Mapping[str, Any]) -> "Delta":
+        """
+        Build a Delta from a deltas.csv-style row.
+
+        Values may be strings (csv.DictReader, DB reader) or ints. The
+        new_* columns are only meaningful for MODIFY and are only read for
+        MODIFY rows; elsewhere they may be missing, NULL or NaN (archived
+        parquet) and are left at 0.
+        """
+        delta_type = row["delta_type"]
+        if delta_type == "MODIFY":
+            new_order_id = int(row.get("new_order_id", 0))
+            new_price = int(row.get("new_price", 0))
+            new_quantity = int(row.get("new_quantity", 0))
+        else:
+            new_order_id = new_price = new_quantity = 0
+        return cls(
+            int(row["timestamp"]),
+            delta_type,
+            int(row["order_id"]),
+            int(row["client_id"]),
+            Side(row["side"]),
+            int(row["price"]),
+            int(row["quantity"]),
+            int(row["remaining_qty"]),
+            new_order_id,
+            new_price,
+            new_quantity,
+        )
+
+    @classmethod
+    def parser(cls, fieldnames: Sequence[str]) -> Callable[[Sequence[str]], "Delta"]:
+        """
+        Return a function that builds a Delta from one split deltas.csv line.
+
+        Column positions are resolved once from the header, so each line is
+        converted straight from its field list without an intermediate dict.
+        """
+        col = {name: i for i, name in enumerate(fieldnames)}
+        ts, dtype, oid, cid, side, price, qty, rem = (
+            col[name]
+            for name in (
+                "timestamp",
+                "delta_type",
+                "order_id",
+                "client_id",
+                "side",
+                "price",
+                "quantity",
+                "remaining_qty",
+            )
+        )
+        new_oid = col.get("new_order_id")
+        new_price = col.get("new_price")
+        new_qty = col.get("new_quantity")
+
+        def parse(fields: Sequence[str]) -> "Delta":
+            return cls(
+                int(fields[ts]),
+                fields[dtype],
+                int(fields[oid]),
+                int(fields[cid]),
+                Side(fields[side]),
+                int(fields[price]),
+                int(fields[qty]),
+                int(fields[rem]),
+                0 if new_oid is None else int(fields[new_oid]),
+                0 if new_price is None else int(fields[new_price]),
+                0 if new_qty is None else int(fields[new_qty]),
+            )
+
+        return parse
+
+
+def _copy_levels(levels: SortedDict):
+    """Yield (price, queue) pairs with fresh deques of copied orders."""
+    for price, queue in levels.items():
+        yield price, deque(
+            Order(o.order_id, o.client_id, o.side, o.price, o.quantity, o.timestamp)
+            for o in queue
+        )
+
+
 class OrderBook:
     """
     Reconstructs order book state by processing delta events.
 
     Maintains full order-level detail using SortedDict with deque at each
     price level, matching the C++ implementation. Bids are sorted descending
-    (highest first), asks are sorted ascending (lowest first).
+    (highest first), asks are sorted ascending (lowest first). Total resting
+    quantity per level is kept alongside, so top-of-book and depth queries
+    don't re-sum the queues.
     """
 
     def __init__(self):
         self.asks = SortedDict()
         self.bids = SortedDict(lambda x: -x)
+        self._bid_qty: dict[int, int] = {}
+        self._ask_qty: dict[int, int] = {}
         self.registry: dict[int, tuple[int, Side]] = {}
         self.order_add_timestamps: dict[int, int] = {}
         self.timestamp = 0
 
+    def clear(self) -> None:
+        """Remove all orders and reset the book to its initial empty state."""
+        self.asks.clear()
+        self.bids.clear()
+        self._bid_qty.clear()
+        self._ask_qty.clear()
+        self.registry.clear()
+        self.order_add_timestamps.clear()
+        self.timestamp = 0
+
+    def copy(self) -> "OrderBook":
+        """Return an independent copy of the book; orders are copied, not shared."""
+        new = OrderBook()
+        new.bids = SortedDict(self.bids.key, _copy_levels(self.bids))
+        new.asks = SortedDict(_copy_levels(self.asks))
+        new._bid_qty = self._bid_qty.copy()
+        new._ask_qty = self._ask_qty.copy()
+        new.registry = self.registry.copy()
+        new.order_add_timestamps = self.order_add_timestamps.copy()
+        new.timestamp = self.timestamp
+        return new
+
     def _get_book(self, side: Side) -> SortedDict:
-        return self.bids if side == Side.BUY else self.asks
+        return self.bids if side is Side.BUY else self.asks
+
+    def _level_qty(self, side: Side) -> dict[int, int]:
+        return self._bid_qty if side is Side.BUY else self._ask_qty
 
     def _add_order(self, order: Order) -> None:
-        book = self._get_book(order.side)
-        if order.price not in book:
-            book[order.price] = deque()
-        book[order.price].append(order)
-        self.registry[order.order_id] = (order.price, order.side)
+        price = order.price
+        side = order.side
+        if side is Side.BUY:
+            book, level_qty = self.bids, self._bid_qty
+        else:
+            book, level_qty = self.asks, self._ask_qty
+        queue = book.get(price)
+        if queue is None:
+            queue = book[price] = deque()
+            level_qty[price] = order.quantity
+        else:
+            level_qty[price] += order.quantity
+        queue.append(order)
+        self.registry[order.order_id] = (price, side)
 
     def _add_order_sorted(self, order: Order) -> None:
         """Add order in correct queue position based on timestamp (FIFO order)."""
         book = self._get_book(order.side)
+        level_qty = self._level_qty(order.side)
+        level_qty[order.price] = level_qty.get(order.price, 0) + order.quantity
         if order.price not in book:
             book[order.price] = deque()
             book[order.price].append(order)
@@ -66,85 +207,126 @@ class OrderBook:
         self.registry[order.order_id] = (order.price, order.side)
 
     def _remove_order(self, order_id: int) -> Optional[Order]:
-        if order_id not in self.registry:
+        entry = self.registry.pop(order_id, None)
+        if entry is None:
             return None
 
-        price, side = self.registry[order_id]
-        book = self._get_book(side)
-
-        if price not in book:
-            del self.registry[order_id]
+        price, side = entry
+        book = self.bids if side is Side.BUY else self.asks
+        queue = book.get(price)
+        if queue is None:
             return None
 
-        queue = book[price]
         for i, order in enumerate(queue):
             if order.order_id == order_id:
                 del queue[i]
-                if not queue:
+                level_qty = self._level_qty(side)
+                if queue:
+                    level_qty[price] -= order.quantity
+                else:
                     del book[price]
-                del self.registry[order_id]
+                    del level_qty[price]
                 return order
 
-        del self.registry[order_id]
         return None
 
     def _update_order_quantity(self, order_id: int, new_quantity: int) -> None:
-        if order_id not in self.registry:
+        entry = self.registry.get(order_id)
+        if entry is None:
             return
 
-        price, side = self.registry[order_id]
-        book = self._get_book(side)
-
-        if price not in book:
+        price, side = entry
+        book = self.bids if side is Side.BUY else self.asks
+        queue = book.get(price)
+        if queue is None:
             return
 
-        for order in book[price]:
+        for order in queue:
             if order.order_id == order_id:
+                self._level_qty(side)[price] += new_quantity - order.quantity
                 order.quantity = new_quantity
                 return
 
-    def apply_delta(self, delta: dict) -> None:
+    def apply_delta(self, delta: Delta | Mapping[str, Any]) -> None:
         """
         Apply a forward delta to update the order book state.
 
         Handles ADD, FILL, CANCEL, and MODIFY delta types. Updates the book's
         timestamp and tracks order creation times for reverse delta support.
+        Accepts a Delta or a deltas.csv-style row mapping.
         """
-        self.timestamp = int(delta["timestamp"])
-        delta_type = delta["delta_type"]
-        order_id = int(delta["order_id"])
-        side = Side(delta["side"])
-        price = int(delta["price"])
-        remaining = int(delta["remaining_qty"])
-        client_id = int(delta["client_id"])
-
-        if delta_type == "ADD":
-            order = Order(order_id, client_id, side, price, remaining, self.timestamp)
-            self._add_order(order)
-            self.order_add_timestamps[order_id] = self.timestamp
-
-        elif delta_type == "FILL":
-            if remaining == 0:
-                self._remove_order(order_id)
-            else:
-                self._update_order_quantity(order_id, remaining)
-
-        elif delta_type == "CANCEL":
-            self._remove_order(order_id)
-
-        elif delta_type == "MODIFY":
-            new_order_id = int(delta["new_order_id"])
-            new_price = int(delta["new_price"])
-            new_quantity = int(delta["new_quantity"])
-
-            self._remove_order(order_id)
-            new_order = Order(
-                new_order_id, client_id, side, new_price, new_quantity, self.timestamp
-            )
-            self._add_order(new_order)
-            self.order_add_timestamps[new_order_id] = self.timestamp
+        if not isinstance(delta, Delta):
+            delta = Delta.from_row(delta)
 
-    def apply_reverse_delta(self, delta: dict, prev_timestamp: int) -> None:
+        self.timestamp = delta.timestamp
+        handler = self._FORWARD_HANDLERS.get(delta.delta_type)
+        if handler is not None:
+            handler(self, delta)
+
+    def apply_deltas(self, deltas: Iterable[Delta | Mapping[str, Any]]) -> None:
+        """
+        Apply a sequence of forward deltas in order.
+
+        Equivalent to calling apply_delta on each item, with the handler
+        table and Delta.from_row looked up once for the whole batch.
+        """
+        handlers = self._FORWARD_HANDLERS
+        from_row = Delta.from_row
+        for delta in deltas:
+            if not isinstance(delta, Delta):
+                delta = from_row(delta)
+            self.timestamp = delta.timestamp
+            handler = handlers.get(delta.delta_type)
+            if handler is not None:
+                handler(self, delta)
+
+    def _apply_add(self, delta: Delta) -> None:
+        order = Order(
+            delta.order_id,
+            delta.client_id,
+            delta.side,
+            delta.price,
+            delta.remaining_qty,
+            self.timestamp,
+        )
+        self._add_order(order)
+        self.order_add_timestamps[delta.order_id] = self.timestamp
+
+    def _apply_fill(self, delta: Delta) -> None:
+        if delta.remaining_qty == 0:
+            self._remove_order(delta.order_id)
+        else:
+            self._update_order_quantity(delta.order_id, delta.remaining_qty)
+
+    def _apply_cancel(self, delta: Delta) -> None:
+        self._remove_order(delta.order_id)
+
+    def _apply_modify(self, delta: Delta) -> None:
+        new_order_id = delta.new_order_id
+
+        self._remove_order(delta.order_id)
+        new_order = Order(
+            new_order_id,
+            delta.client_id,
+            delta.side,
+            delta.new_price,
+            delta.new_quantity,
+            self.timestamp,
+        )
+        self._add_order(new_order)
+        self.order_add_timestamps[new_order_id] = self.timestamp
+
+    # delta_type -> forward handler; one dict lookup instead of an if/elif chain
+    _FORWARD_HANDLERS = {
+        "ADD": _apply_add,
+        "FILL": _apply_fill,
+        "CANCEL": _apply_cancel,
+        "MODIFY": _apply_modify,
+    }
+
+    def apply_reverse_delta(
+        self, delta: Delta | Mapping[str, Any], prev_timestamp: int
+    ) -> None:
         """
         Apply a reverse delta to revert the order book to its previous state.
 
@@ -154,54 +336,86 @@ class OrderBook:
         removes the new order and restores the original.
 
         Args:
-            delta: The delta dict to reverse.
+            delta: The Delta (or delta row mapping) to reverse.
             prev_timestamp: The timestamp to restore the book to.
         """
-        delta_type = delta["delta_type"]
-        order_id = int(delta["order_id"])
-        side = Side(delta["side"])
-        price = int(delta["price"])
-        quantity = int(delta["quantity"])
-        remaining = int(delta["remaining_qty"])
-        client_id = int(delta["client_id"])
-
-        if delta_type == "ADD":
-            self._remove_order(order_id)
-            self.order_add_timestamps.pop(order_id, None)
-
-        elif delta_type == "FILL":
-            prev_quantity = remaining + quantity
-            if remaining == 0:
-                # Only re-add if this order was previously in the book.
-                # Aggressor orders that matched immediately were never added
-                # and should not be restored.
-                if order_id in self.order_add_timestamps:
-                    orig_ts = self.order_add_timestamps[order_id]
-                    order = Order(
-                        order_id, client_id, side, price, prev_quantity, orig_ts
-                    )
-                    # Insert in correct position based on timestamp (FIFO order)
-                    self._add_order_sorted(order)
-            else:
-                self._update_order_quantity(order_id, prev_quantity)
-
-        elif delta_type == "CANCEL":
-            orig_ts = self.order_add_timestamps.get(order_id, prev_timestamp)
-            order = Order(order_id, client_id, side, price, remaining, orig_ts)
-            self._add_order_sorted(order)
-
-        elif delta_type == "MODIFY":
-            new_order_id = int(delta["new_order_id"])
-
-            self._remove_order(new_order_id)
-            self.order_add_timestamps.pop(new_order_id, None)
-
-            orig_ts = self.order_add_timestamps.get(order_id, prev_timestamp)
-            order = Order(order_id, client_id, side, price, quantity, orig_ts)
-            self._add_order_sorted(order)
+        if not isinstance(delta, Delta):
+            delta = Delta.from_row(delta)
+
+        handler = self._REVERSE_HANDLERS.get(delta.delta_type)
+        if handler is not None:
+            handler(self, delta, prev_timestamp)
+        self.timestamp = prev_timestamp
+
+    def apply_reverse_deltas(
+        self, deltas: Sequence[Delta | Mapping[str, Any]], prev_timestamp: int
+    ) -> None:
+        """
+        Undo a timestamp's group of forward deltas, last delta first.
 
+        Equivalent to calling apply_reverse_delta on each item of
+        reversed(deltas), with the handler table looked up once per batch.
+        """
+        handlers = self._REVERSE_HANDLERS
+        from_row = Delta.from_row
+        for delta in reversed(deltas):
+            if not isinstance(delta, Delta):
+                delta = from_row(delta)
+            handler = handlers.get(delta.delta_type)
+            if handler is not None:
+                handler(self, delta, prev_timestamp)
         self.timestamp = prev_timestamp
 
+    def _reverse_add(self, delta: Delta, prev_timestamp: int) -> None:
+        self._remove_order(delta.order_id)
+        self.order_add_timestamps.pop(delta.order_id, None)
+
+    def _reverse_fill(self, delta: Delta, prev_timestamp: int) -> None:
+        order_id = delta.order_id
+        prev_quantity = delta.remaining_qty + delta.quantity
+        if delta.remaining_qty == 0:
+            # Only re-add if this order was previously in the book.
+            # Aggressor orders that matched immediately were never added
+            # and should not be restored.
+            orig_ts = self.order_add_timestamps.get(order_id)
+            if orig_ts is not None:
+                order = Order(
+                    order_id, delta.client_id, delta.side, delta.price, prev_quantity, orig_ts
+                )
+                # Insert in correct position based on timestamp (FIFO order)
+                self._add_order_sorted(order)
+        else:
+            self._update_order_quantity(order_id, prev_quantity)
+
+    def _reverse_cancel(self, delta: Delta, prev_timestamp: int) -> None:
+        order_id = delta.order_id
+        orig_ts = self.order_add_timestamps.get(order_id, prev_timestamp)
+        order = Order(
+            order_id, delta.client_id, delta.side, delta.price, delta.remaining_qty, orig_ts
+        )
+        self._add_order_sorted(order)
+
+    def _reverse_modify(self, delta: Delta, prev_timestamp: int) -> None:
+        new_order_id = delta.new_order_id
+
+        self._remove_order(new_order_id)
+        self.order_add_timestamps.pop(new_order_id, None)
+
+        order_id = delta.order_id
+        orig_ts = self.order_add_timestamps.get(order_id, prev_timestamp)
+        order = Order(
+            order_id, delta.client_id, delta.side, delta.price, delta.quantity, orig_ts
+        )
+        self._add_order_sorted(order)
+
+    # delta_type -> reverse handler, mirroring _FORWARD_HANDLERS
+    _REVERSE_HANDLERS = {
+        "ADD": _reverse_add,
+        "FILL": _reverse_fill,
+        "CANCEL": _reverse_cancel,
+        "MODIFY": _reverse_modify,
+    }
+
     def get_order(self, order_id: int) -> Optional[Order]:
         if order_id not in self.registry:
             return None
@@ -231,15 +445,13 @@ class OrderBook:
         if not self.bids:
             return None
         price = self.bids.keys()[0]
-        total_qty = sum(o.quantity for o in self.bids[price])
-        return price, total_qty
+        return price, self._bid_qty[price]
 
     def best_ask(self) -> Optional[tuple[int, int]]:
         if not self.asks:
             return None
         price = self.asks.keys()[0]
-        total_qty = sum(o.quantity for o in self.asks[price])
-        return price, total_qty
+        return price, self._ask_qty[price]
 
     def spread(self) -> Optional[int]:
         bb = self.best_bid()
@@ -256,32 +468,21 @@ class OrderBook:
         return None
 
     def get_depth(self, levels: int = 10) -> tuple[list, list]:
-        bid_levels = []
-        for i, price in enumerate(self.bids.keys()):
-            if i >= levels:
-                break
-            total_qty = sum(o.quantity for o in self.bids[price])
-            bid_levels.append((price, total_qty))
-
-        ask_levels = []
-        for i, price in enumerate(self.asks.keys()):
-            if i >= levels:
-                break
-            total_qty = sum(o.quantity for o in self.asks[price])
-            ask_levels.append((price, total_qty))
+        levels = max(levels, 0)
+        bid_qty = self._bid_qty
+        bid_levels = [(price, bid_qty[price]) for price in islice(self.bids, levels)]
+
+        ask_qty = self._ask_qty
+        ask_levels = [(price, ask_qty[price]) for price in islice(self.asks, levels)]
 
         return bid_levels, ask_levels
 
     def get_full_depth(self) -> tuple[list, list]:
-        bid_levels = [
-            (price, sum(o.quantity for o in level))
-            for price, level in self.bids.items()
-        ]
-
-        ask_levels = [
-            (price, sum(o.quantity for o in level))
-            for price, level in self.asks.items()
-        ]
+        bid_qty = self._bid_qty
+        bid_levels = [(price, bid_qty[price]) for price in self.bids]
+
+        ask_qty = self._ask_qty
+        ask_levels = [(price, ask_qty[price]) for price in self.asks]
 
         return bid_levels, ask_levels
 